@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import time
+import argparse
+from uuid import uuid4
+
+# Local modules
+from src.schemas import Category, ItemModel
+
+# Constants
+DOCUMENTS = 10_000
+""" Default number of decoded documents. """
+
+
+# ---------------------------------------------------------
+#
+def documents(amount: int) -> list:
+    """ Return DB documents, as they are stored by ItemModel.to_mongo().
+
+    :param amount: Number of documents.
+    :return: DB documents.
+    """
+    return [{'_id': str(uuid4()), 'name': f'Item{idx % 1000}', 'price': 9.99,
+             'count': idx, 'category': Category.TOOLS.value}
+            for idx in range(amount)]
+
+
+# ---------------------------------------------------------
+#
+def decode(amount: int, trusted: bool) -> float:
+    """ Return the number of seconds it takes to decode the documents.
+
+    Every run gets fresh documents, since from_mongo() pops the '_id' key.
+
+    :param amount: Number of documents.
+    :param trusted: Skip validation status.
+    :return: Elapsed time.
+    """
+    docs = documents(amount)
+    ItemModel.trusted = trusted
+
+    try:
+        start = time.perf_counter()
+
+        for doc in docs:
+            ItemModel.from_mongo(doc)
+
+        return time.perf_counter() - start
+
+    finally:
+        ItemModel.trusted = False
+
+
+# ---------------------------------------------------------
+
+if __name__ == '__main__':
+    Form = argparse.ArgumentDefaultsHelpFormatter
+    description = 'Compare validated and trusted ItemModel.from_mongo() decoding.'
+    parser = argparse.ArgumentParser(description=description, formatter_class=Form)
+    parser.add_argument("-n", type=int, dest="amount", default=DOCUMENTS,
+                        help="Number of decoded documents")
+    parser.add_argument("-r", type=int, dest="repeat", default=5,
+                        help="Number of runs, the fastest run is reported")
+    args = parser.parse_args()
+
+    for mode in (False, True):
+        elapsed = min(decode(args.amount, mode) for _ in range(args.repeat))
+        print(f"{'trusted' if mode else 'validated':>9}: {elapsed * 1000:8.2f} ms total, "
+              f"{elapsed / args.amount * 1e6:6.2f} us/document")
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+from typing import Any, List, Callable, NamedTuple
+
+# Third party modules
+import pydantic
+
+# Local modules
+from src.api.item_crud import ItemCrud
+from src.schemas import (Category, ItemModel, QueryArguments,
+                         ItemArgumentResponse)
+from .from_mongo import documents
+
+# Constants
+SIZES = (1, 1000, 100_000)
+""" Default number of documents per benchmark run. """
+MIN_DOCUMENTS = 10_000
+""" Minimum number of documents per timed run, small sizes are run repeatedly. """
+
+
+# ---------------------------------------------------------
+#
+class Case(NamedTuple):
+    """ Benchmark case.
+
+    :ivar name: Case name.
+    :ivar setup: Return the input for a number of documents (not timed).
+    :ivar run: Process the input (timed).
+    """
+    name: str
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+
+
+# ---------------------------------------------------------
+#
+def _payloads(size: int) -> List[dict]:
+    """ Return Item payloads without an id. """
+    return [{'name': f'Item{idx % 1000}', 'price': 9.99, 'count': idx,
+             'category': Category.TOOLS} for idx in range(size)]
+
+
+def _models(size: int) -> List[ItemModel]:
+    """ Return Items. """
+    return [ItemModel(**payload) for payload in _payloads(size)]
+
+
+def _arguments(size: int) -> List[QueryArguments]:
+    """ Return query arguments with a varying number of values. """
+    return [QueryArguments(name='Hammer', price=9.99 if idx % 2 else None,
+                           count=idx if idx % 3 else None, category=Category.TOOLS)
+            for idx in range(size)]
+
+
+def _response(size: int) -> ItemArgumentResponse:
+    """ Return a query response like the fast serialization path builds it. """
+    return ItemArgumentResponse.model_construct(
+        query=QueryArguments(category=Category.TOOLS), next_cursor=None,
+        selection=_models(size))
+
+
+def _trusted(docs: List[dict]) -> List[ItemModel]:
+    """ Return Items decoded without validation. """
+    ItemModel.trusted = True
+
+    try:
+        return [ItemModel.from_mongo(doc) for doc in docs]
+
+    finally:
+        ItemModel.trusted = False
+
+
+CASES = (
+    Case('item_model', _payloads, lambda payloads: [ItemModel(**item) for item in payloads]),
+    Case('from_mongo', documents, lambda docs: [ItemModel.from_mongo(doc) for doc in docs]),
+    Case('from_mongo_trusted', documents, _trusted),
+    Case('to_mongo', _models, lambda models: [model.to_mongo() for model in models]),
+    Case('query_filter', _arguments,
+         lambda arguments: [ItemCrud._query_filter(item) for item in arguments]),
+    Case('item_argument_response', _response, lambda response: response.model_dump_json()),
+)
+""" Benchmarked hot paths. ItemModel construction includes the uuid7 default. """
+
+
+# ---------------------------------------------------------
+#
+def measure(case: Case, size: int, repeat: int) -> dict:
+    """ Return the timing and memory use of a case.
+
+    The input is created before each timed run, since some cases
+    consume it. The peak memory is measured in a separate run, since
+    tracemalloc slows down the code.
+
+    :param case: Benchmark case.
+    :param size: Number of documents.
+    :param repeat: Number of timed runs.
+    :return: Measurement.
+    """
+    inner = max(1, MIN_DOCUMENTS // size)
+    timings = []
+
+    for _ in range(repeat):
+        inputs = [case.setup(size) for _ in range(inner)]
+        start = time.perf_counter()
+
+        for data in inputs:
+            case.run(data)
+
+        timings.append((time.perf_counter() - start) / inner)
+
+    data = case.setup(size)
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = case.run(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+
+    best = min(timings)
+    return {'case': case.name, 'size': size, 'repeat': repeat,
+            'seconds_min': best, 'seconds_median': statistics.median(timings),
+            'per_document_ns': round(best / size * 1e9, 1), 'peak_bytes': peak}
+
+
+# ---------------------------------------------------------
+#
+def run(sizes: List[int], repeat: int, names: List[str]) -> dict:
+    """ Return the measurements of the selected cases.
+
+    :param sizes: Number of documents per run.
+    :param repeat: Number of timed runs.
+    :param names: Selected case names (default is all).
+    :return: Benchmark report.
+    """
+    cases = [case for case in CASES if not names or case.name in names]
+
+    return {'python': platform.python_version(),
+            'pydantic': pydantic.VERSION,
+            'platform': platform.platform(),
+            'results': [measure(case, size, repeat) for case in cases for size in sizes]}
+
+
+# ---------------------------------------------------------
+
+if __name__ == '__main__':
+    Form = argparse.ArgumentDefaultsHelpFormatter
+    description = 'Benchmark the per-document work in the schemas and the repository.'
+    parser = argparse.ArgumentParser(description=description, formatter_class=Form)
+    parser.add_argument("-s", dest="sizes", default=','.join(map(str, SIZES)),
+                        help="Comma separated number of documents per run")
+    parser.add_argument("-r", type=int, dest="repeat", default=5,
+                        help="Number of timed runs, the fastest run is reported")
+    parser.add_argument("-c", dest="cases", action="append", default=[],
+                        choices=[case.name for case in CASES],
+                        help="Case to run, can be repeated (default is all)")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the report as JSON")
+    args = parser.parse_args()
+    report = run([int(size) for size in args.sizes.split(',')], args.repeat, args.cases)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        sys.exit()
+
+    print(f"python {report['python']}, pydantic {report['pydantic']}\n")
+    print(f"{'case':<24}{'size':>8}{'min ms':>12}{'ns/doc':>12}{'peak KiB':>12}")
+
+    for item in report['results']:
+        print(f"{item['case']:<24}{item['size']:>8}{item['seconds_min'] * 1000:>12.3f}"
+              f"{item['per_document_ns']:>12}{item['peak_bytes'] / 1024:>12.1f}")
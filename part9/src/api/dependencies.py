@@ -15,17 +15,39 @@ from fastapi import Depends
 
 # Local modules
 from .item_crud import ItemCrud
-from ..db import Engine, AsyncIOMotorClientSession
+from .interface import ICrudRepository
+from .memory_crud import InMemoryItemCrud
+from ..cache import ItemCache
+from ..config.setup import config
+from ..db import Engine, AsyncIOMotorCollection
+
+# Constants
+MEMORY_CRUD = InMemoryItemCrud() if config.item_repository == 'memory' else None
+""" Worker process in-memory Item store, or None when MongoDB is used. """
+ITEM_CACHE = (ItemCache(max_size=config.item_cache_size, ttl=config.item_cache_ttl)
+              if config.item_cache_size > 0 and MEMORY_CRUD is None else None)
+""" Worker process Item cache, or None when it's disabled. """
 
 
 # ---------------------------------------------------------
 #
 async def get_repository_crud(
-        session: AsyncIOMotorClientSession = Depends(Engine.get_async_session)
-) -> ItemCrud:
-    """ Return Item CRUD operation instance with an active DB session.
+        collection: AsyncIOMotorCollection = Depends(Engine.get_items_collection)
+) -> ICrudRepository:
+    """ Return Item CRUD operation instance for the shared DB collection.
+
+    No DB session is started here, since the Item operations don't need
+    one. An endpoint that needs a transaction or causal consistency can
+    create its own instance with a session from Engine.get_async_session.
 
-    :param session: Active database session.
-    :return: Item CRUD object with an active DB session.
+    The Item cache is included when it's enabled in the configuration.
+    When the in-memory repository is configured, its shared store is
+    returned instead (the collection is None then).
+
+    :param collection: Shared api_db.items collection.
+    :return: Item CRUD object.
     """
-    return ItemCrud(session=session)
+    if MEMORY_CRUD is not None:
+        return MEMORY_CRUD
+
+    return ItemCrud(collection=collection, cache=ITEM_CACHE)
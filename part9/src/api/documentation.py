@@ -11,7 +11,10 @@ VERSION INFO::
 """
 
 # BUILTIN modules
-from fastapi import Path
+from fastapi import Path, Query
+
+# Local modules
+from ..config.setup import config
 
 query_example = {
     "query": {
@@ -20,6 +23,7 @@ query_example = {
         "price": None,
         "category": "tools"
     },
+    "next_cursor": None,
     "selection": [
         {
             "count": 20,
@@ -46,6 +50,19 @@ item_example = {
     "id": "32c1383a-b79e-43c1-8313-c8704382c48a"
 }
 
+bulk_example = {
+    "ids": [
+        "dbb86c27-2eed-410d-881e-ad47487dd228",
+        None
+    ],
+    "errors": [
+        {
+            "index": 1,
+            "detail": "E11000 duplicate key error collection: api_db.items index: _id_"
+        }
+    ]
+}
+
 license_info = {
     "name": "License: Apache 2.0",
     "url": "https://www.apache.org/licenses/LICENSE-2.0.html",
@@ -59,15 +76,22 @@ tags_metadata = [
     },
     {
         "name": "Health endpoint",
-        "description": "A health check that return "
-                       "the MongoDB connection status.",
+        "description": "Health checks that return the process liveness "
+                       "and the latest probed MongoDB connection status.",
+    },
+    {
+        "name": "Metrics endpoint",
+        "description": "Request, MongoDB command, connection pool "
+                       "and Item cache metrics in Prometheus format.",
     }
 ]
 
 resource_example = [
     {
         "name": "MongoDb",
-        "status": True
+        "status": True,
+        "latency": 0.0012,
+        "last_success": "2024-04-26T15:38:52.123456Z"
     }
 ]
 
@@ -78,6 +102,16 @@ item_id_documentation = Path(
 )
 """ OpenAPI item ID documentation. """
 
+item_fields = '(id|name|category|price|count)'
+fields_documentation = Query(
+    None,
+    pattern=f'^{item_fields}(,{item_fields})*$',
+    description='Comma separated list of the item fields to return, '
+                '`id` is always returned.<br>'
+                '*Example: `id,count`*.',
+)
+""" OpenAPI item fields (projection) documentation. """
+
 get_query_documentation = {
     "name": {'default': None, 'min_length': 1, 'max_length': 8,
              'description': 'Name of the item.<br>'
@@ -106,20 +140,43 @@ put_query_documentation = {
 }
 """ OpenAPI item PUT query parameters documentation. """
 
+page_query_documentation = {
+    "limit": {'default': config.page_size, 'ge': 1, 'le': config.max_page_size,
+              'description': 'Maximum number of items on the page.<br>'
+                             '*Example: `100`*.'},
+    "after": {'default': None,
+              'description': 'Opaque cursor from the previous page, returned in the '
+                             '`Link` header (and the `next_cursor` field for queries).'},
+}
+""" OpenAPI item pagination query parameters documentation. """
+
+export_query_documentation = {
+    "batch_size": {'default': config.export_batch_size, 'ge': 1, 'le': 10000,
+                   'description': 'Number of items fetched from the DB, and written '
+                                  'to the response, at a time.<br>'
+                                  '*Example: `1000`*.'},
+}
+""" OpenAPI item export query parameters documentation. """
+
 description = """
 <img width="35%" align="right" src="/static/fastapi_mongo.png"/>
 
 ### Extensive example on how to use FastAPI and MongoDB to create a RESTful API.
 
+**Item lists are paginated:**
+  - Use the `limit` URL parameter to set the page size.
+  - A full page has a `Link` header with the URL of the next page.
+
 **The following status codes are returned:**
   - Successful codes:
     - **200**: for all GET and PUT operations.
-    - **201**: for POST operation.
+    - **201**: for POST operations (a bulk create reports failed items in the response).
     - **204**: for DELETE operation.
 
   - Failing codes:
     - **400**: POST or PUT operations failed with a DB error.
     - **400**: No query arguments provided in URL when at least one is required.
+    - **400**: Invalid page cursor provided in URL.
     - **401**: Access is denied on protected endpoints without proper authentication.
     - **404**: Search key _item_id_ is not found in the DB.
     - **406**: No query arguments provided in URL.
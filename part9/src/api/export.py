@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import io
+import csv
+from typing import AsyncIterator
+
+# Local modules
+from ..schemas import ItemModel
+
+# Constants
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+""" Media type for newline delimited JSON. """
+CSV_MEDIA_TYPE = 'text/csv'
+""" Media type for comma separated values. """
+CSV_FIELDS = ('id', 'name', 'category', 'price', 'count')
+""" Exported CSV columns. """
+
+
+# ---------------------------------------------------------
+#
+async def ndjson_chunks(items: AsyncIterator[ItemModel],
+                        batch_size: int) -> AsyncIterator[str]:
+    """ Return the Items as newline delimited JSON, one chunk per batch.
+
+    The first Item is sent on its own, so the response starts as soon
+    as the first Item is read.
+
+    :param items: Items to export.
+    :param batch_size: Number of Items in each chunk.
+    :return: NDJSON chunks.
+    """
+    lines = []
+    size = 1
+
+    async for item in items:
+        lines.append(item.model_dump_json())
+
+        if len(lines) == size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+            size = batch_size
+
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+# ---------------------------------------------------------
+#
+async def csv_chunks(items: AsyncIterator[ItemModel],
+                     batch_size: int) -> AsyncIterator[str]:
+    """ Return the Items as CSV with a header row, one chunk per batch.
+
+    The header row is sent straight away, and the first Item on its own,
+    so the response starts before the first batch is read.
+
+    :param items: Items to export.
+    :param batch_size: Number of Items in each chunk.
+    :return: CSV chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDS)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    rows = 0
+    size = 1
+
+    async for item in items:
+        writer.writerow((item.id, item.name, item.category.value, item.price, item.count))
+        rows += 1
+
+        if rows == size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+            size = batch_size
+
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -15,7 +15,7 @@ from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
 # local modules
-from ..health_manager import HealthManager
+from ..health_manager import HEALTH_MANAGER
 from ..schemas import HealthResponseModel, HealthStatusError
 
 # Constants
@@ -32,8 +32,42 @@ ROUTER = APIRouter(prefix="/health", tags=["Health endpoint"])
 )
 async def health_check() -> JSONResponse:
     """ ***Return Health check status.*** """
-    content = await HealthManager().get_status()
+    content = HEALTH_MANAGER.get_status()
     response_code = (200 if content.status else 500)
 
     return JSONResponse(status_code=response_code,
-                        content=content.model_dump())
+                        content=content.model_dump(mode='json'))
+
+
+# ---------------------------------------------------------
+#
+@ROUTER.get(
+    '/live',
+    response_model=HealthResponseModel,
+)
+async def liveness_check() -> JSONResponse:
+    """ ***Return Liveness status, the process is up and responding.***
+
+    No resources are checked, so a DB outage doesn't restart the service.
+    """
+    return JSONResponse(content=HEALTH_MANAGER.get_liveness().model_dump(mode='json'))
+
+
+# ---------------------------------------------------------
+#
+@ROUTER.get(
+    '/ready',
+    response_model=HealthResponseModel,
+    responses={503: {"model": HealthStatusError}},
+)
+async def readiness_check() -> JSONResponse:
+    """ ***Return Readiness status, the used resources are available.***
+
+    This is the latest status from the background probe, the service
+    is not ready until the first probe has finished.
+    """
+    content = HEALTH_MANAGER.get_status()
+    response_code = (200 if content.status else 503)
+
+    return JSONResponse(status_code=response_code,
+                        content=content.model_dump(mode='json'))
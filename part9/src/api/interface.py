@@ -12,15 +12,16 @@ VERSION INFO::
 
 # BUILTIN modules
 from uuid import UUID
-from typing import List
+from typing import List, Set, Optional, AsyncIterator
 from typing import Protocol
 
 # Third party modules
 from pymongo.results import DeleteResult
 
 # Local modules
-from ..db import AsyncIOMotorClientSession
-from ..schemas import ItemModel, ItemPayload, QueryArguments
+from ..db import AsyncIOMotorCollection, AsyncIOMotorClientSession
+from ..schemas import (ItemModel, ItemPayload, QueryArguments,
+                       UpdateArguments, BulkCreateResponse)
 
 
 # -----------------------------------------------------------------------------
@@ -28,9 +29,11 @@ from ..schemas import ItemModel, ItemPayload, QueryArguments
 class ICrudRepository(Protocol):
     """ Item CRUD Interface class.
 
-    :ivar session: Active database session.
+    :ivar collection: Shared api_db.items collection.
+    :ivar session: Possible explicit database session.
     """
-    session: AsyncIOMotorClientSession
+    collection: AsyncIOMotorCollection
+    session: Optional[AsyncIOMotorClientSession]
 
     async def create(self, payload: ItemPayload) -> ItemModel:
         """ Create Item in DB collection api_db.items.
@@ -40,31 +43,64 @@ class ICrudRepository(Protocol):
         :except HTTPException (400): Create failed for item_id in collection api_db.items.
         """
 
-    async def read_all(self) -> List[ItemModel]:
-        """ Read all existing Items in DB collection api_db.items.
+    async def create_many(self, payloads: List[ItemPayload]) -> BulkCreateResponse:
+        """ Create Items in DB collection api_db.items.
 
-        :return: List of found Items.
+        :param payloads: New Item payloads.
+        :return: Created Item ids and failed Items.
         """
 
-    async def read(self, key: UUID) -> ItemModel:
+    async def read_all(self, limit: int, after: Optional[UUID] = None,
+                       fields: Optional[Set[str]] = None) -> List[ItemModel]:
+        """ Read a page of existing Items in DB collection api_db.items.
+
+        :param limit: Maximum number of Items to read.
+        :param after: Index key of the last Item on the previous page.
+        :param fields: Possible selected Item fields (default is all).
+        :return: List of found Items, in index key order.
+        """
+
+    def stream(self, batch_size: int) -> AsyncIterator[ItemModel]:
+        """ Iterate over all existing Items in DB collection api_db.items.
+
+        :param batch_size: Number of Items fetched from the DB at a time.
+        :return: Async iterator of Items, in index key order.
+        """
+
+    async def read(self, key: UUID, fields: Optional[Set[str]] = None) -> ItemModel:
         """ Read Item for a matching index key from DB collection api_db.items.
 
         :param key: Index key.
+        :param fields: Possible selected Item fields (default is all).
         :return: Found Item.
         """
 
-    async def query(self, arguments: QueryArguments) -> List[ItemModel]:
-        """ Read all Items that match the query arguments from DB collection api_db.items.
+    async def exists(self, key: UUID) -> bool:
+        """ Check if an Item with a matching index key exists in DB collection api_db.items.
+
+        :param key: Index key.
+        :return: Existence status.
+        """
+
+    async def query(self, arguments: QueryArguments, limit: int,
+                    after: Optional[UUID] = None,
+                    fields: Optional[Set[str]] = None) -> List[ItemModel]:
+        """ Read a page of Items that match the query arguments from DB collection api_db.items.
 
         :param arguments: Search arguments.
-        :return: List of found Items.
+        :param limit: Maximum number of Items to read.
+        :param after: Index key of the last Item on the previous page.
+        :param fields: Possible selected Item fields (default is all).
+        :return: List of found Items, in index key order.
         """
 
-    async def update(self, payload: ItemModel) -> bool:
-        """ Update Item in DB collection api_db.items.
+    async def update(self, key: UUID, arguments: UpdateArguments) -> Optional[ItemModel]:
+        """ Update Item for a matching index key in DB collection api_db.items.
 
-        :param payload: Updated Item payload.
-        :return: DB update result.
+        :param key: Index key.
+        :param arguments: Changed Item values.
+        :return: Updated Item, or None when it's not found.
+        :except HTTPException (400): Update failed for item_id in collection api_db.items.
         """
 
     async def delete(self, key: UUID) -> DeleteResult:
@@ -12,15 +12,21 @@ VERSION INFO::
 
 # BUILTIN modules
 from uuid import UUID
-from typing import List
+from typing import List, Set, Union, Optional, AsyncIterator
 
 # Third party modules
+from pymongo import ASCENDING, ReturnDocument
 from fastapi import HTTPException
 from pymongo.results import DeleteResult
+from pymongo.errors import BulkWriteError, OperationFailure
 
 # Local modules
-from ..db import AsyncIOMotorClientSession
-from ..schemas import (ItemPayload, ItemModel, QueryArguments)
+from ..cache import ItemCache
+from ..custom_logging import REQUEST_ID
+from ..config.setup import config
+from ..db import AsyncIOMotorCollection, AsyncIOMotorClientSession, NAME_COLLATION
+from ..schemas import (ItemPayload, ItemModel, PartialItemModel, QueryArguments,
+                       UpdateArguments, BulkItemError, BulkCreateResponse)
 
 
 # -----------------------------------------------------------------------------
@@ -30,115 +36,313 @@ class ItemCrud:
 
     This class implements the IRepository protocol for Item CRUD operations.
 
-    :ivar session: Active database session.
+    The operations use an implicit DB session by default. An explicit
+    session is only needed when the operations must run in a transaction
+    or need causal consistency.
+
+    Every DB command has the current request ID as its comment, so that
+    a slow request can be found in the MongoDB profiler and logs.
+
+    :ivar collection: Shared api_db.items collection.
+    :type collection: C{motor.motor_asyncio.AsyncIOMotorCollection}
+    :ivar cache: Possible read-through Item cache.
+    :type cache: C{src.cache.ItemCache}
+    :ivar session: Possible explicit database session.
     :type session: C{motor.motor_asyncio.AsyncIOMotorClientSession}
     """
 
-    def __init__(self, session: AsyncIOMotorClientSession):
+    def __init__(self, collection: AsyncIOMotorCollection,
+                 cache: Optional[ItemCache] = None,
+                 session: Optional[AsyncIOMotorClientSession] = None):
         """ Implicit constructor.
 
-        :param session: Active database session.
+        :param collection: Shared api_db.items collection.
+        :param cache: Possible read-through Item cache.
+        :param session: Possible explicit database session.
         """
+        self.cache = cache
         self.session = session
+        self.collection = collection
+
+    # ---------------------------------------------------------
+    #
+    def _options(self) -> dict:
+        """ Return the options used by every DB operation.
+
+        :return: DB session and request ID comment.
+        """
+        return {'session': self.session, 'comment': REQUEST_ID.get()}
 
     # ---------------------------------------------------------
     #
     @staticmethod
-    def _match(item: dict, args: QueryArguments) -> bool:
-        """ Check if the item matches the query arguments.
+    def _query_filter(args: QueryArguments) -> dict:
+        """ Return a MongoDB filter document for the query arguments.
 
         Note that there is a check in the API layer that verifies that at
         least one of the query parameters has a value, so we don't need
         to do that here.
 
-        :param item: Item object from the DB.
+        The name comparison is case-insensitive, which is handled by
+        running the query with the NAME_COLLATION (see query method).
+
         :param args: URL query arguments.
-        :return: Match status.
+        :return: MongoDB filter document.
+        """
+        query = {}
+
+        if args.price is not None:
+            query['price'] = args.price
+        if args.count is not None:
+            query['count'] = args.count
+        if args.name is not None:
+            query['name'] = args.name
+        if args.category is not None:
+            query['category'] = args.category.value
+
+        return query
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _page_filter(query: dict, after: Optional[UUID]) -> dict:
+        """ Return the filter document restricted to Items after the index key.
+
+        Since the index key is a time ordered uuid7, this is a range scan
+        on the _id index that returns the Items in creation order.
+
+        :param query: MongoDB filter document.
+        :param after: Index key of the last Item on the previous page.
+        :return: MongoDB filter document.
         """
-        return all(
-            (
-                args.price is None or item['price'] == args.price,
-                args.count is None or item['count'] == args.count,
-                args.name is None or item['name'].lower() == args.name.lower(),
-                args.category is None or item['category'] == args.category.value,
-            )
-        )
+        if after is None:
+            return query
+
+        return {**query, '_id': {'$gt': str(after)}}
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _projection(fields: Optional[Set[str]]) -> Optional[dict]:
+        """ Return a MongoDB projection for the selected Item fields.
+
+        :param fields: Possible selected Item fields.
+        :return: MongoDB projection, or None for all fields.
+        """
+        if fields is None:
+            return None
+
+        return {'_id': 1} | {field: 1 for field in fields if field != 'id'}
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _to_model(item: dict, fields: Optional[Set[str]]) -> Union[ItemModel, PartialItemModel]:
+        """ Return the DB document as an Item model.
+
+        :param item: Item document from the DB.
+        :param fields: Possible selected Item fields.
+        :return: Complete Item, or partial Item when fields are selected.
+        """
+        return (ItemModel.from_mongo(item) if fields is None
+                else PartialItemModel.from_mongo(item))
 
     # ---------------------------------------------------------
     #
     async def create(self, payload: ItemPayload) -> ItemModel:
         """ Create Item in DB collection api_db.items.
 
+        The new Item is added to the Item cache when it's available.
+
         :param payload: New Item payload.
         :return: DB create response.
         :except HTTPException (400): Create failed for item_id in collection api_db.items.
         """
         db_item = ItemModel(**payload.model_dump())
-        response = await self.session.client.api_db.items.insert_one(db_item.to_mongo())
+        response = await self.collection.insert_one(db_item.to_mongo(),
+                                                   **self._options())
 
         if not response.acknowledged:
             errmsg = f"Create failed for id='{db_item.id}' in api_db.items"
             raise HTTPException(status_code=400, detail=errmsg)
 
+        if self.cache is not None:
+            self.cache.put(db_item)
+
         return db_item
 
     # ---------------------------------------------------------
     #
-    async def read_all(self) -> List[ItemModel]:
-        """ Read all existing Items in DB collection api_db.items.
+    async def create_many(self, payloads: List[ItemPayload]) -> BulkCreateResponse:
+        """ Create Items in DB collection api_db.items.
+
+        The Items are inserted in unordered chunks of bulk_chunk_size,
+        so a failed Item does not stop the rest from being inserted.
+
+        :param payloads: New Item payloads.
+        :return: Created Item ids and failed Items.
+        """
+        errors = []
+        size = config.bulk_chunk_size
+        db_items = [ItemModel(**payload.model_dump()) for payload in payloads]
+        ids = [db_item.id for db_item in db_items]
+
+        for start in range(0, len(db_items), size):
+            documents = [db_item.to_mongo() for db_item in db_items[start:start + size]]
+
+            try:
+                await self.collection.insert_many(documents, ordered=False,
+                                                  **self._options())
+
+            except BulkWriteError as why:
+                for error in why.details['writeErrors']:
+                    index = start + error['index']
+                    ids[index] = None
+                    errors.append(BulkItemError(index=index, detail=error['errmsg']))
+
+        return BulkCreateResponse(ids=ids, errors=errors)
+
+    # ---------------------------------------------------------
+    #
+    async def read_all(self, limit: int, after: Optional[UUID] = None,
+                       fields: Optional[Set[str]] = None) -> List[ItemModel]:
+        """ Read a page of existing Items in DB collection api_db.items.
+
+        :param limit: Maximum number of Items to read.
+        :param after: Index key of the last Item on the previous page.
+        :param fields: Possible selected Item fields (default is all).
+        :return: List of found Items, in index key order.
+        """
+        cursor = self.collection.find(
+            self._page_filter({}, after), projection=self._projection(fields),
+            **self._options()
+        ).sort('_id', ASCENDING).limit(limit)
+
+        return [self._to_model(item, fields) async for item in cursor]
 
-        :return: List of found Items.
+    # ---------------------------------------------------------
+    #
+    async def stream(self, batch_size: int) -> AsyncIterator[ItemModel]:
+        """ Iterate over all existing Items in DB collection api_db.items.
+
+        Items are fetched from the DB cursor in batches, so memory use
+        depends on the batch size and not on the collection size. When
+        the export_snapshot config parameter is set all Items are read
+        from the same point in time. This requires a replica set, and the
+        export must finish within the server snapshot history window
+        (minSnapshotHistoryWindowInSeconds, 5 minutes by default). A
+        longer export fails after the response headers have been sent,
+        so the client gets a truncated body.
+
+        :param batch_size: Number of Items fetched from the DB at a time.
+        :return: Async iterator of Items, in index key order.
         """
-        result = []
+        client = self.collection.database.client
 
-        async for item in self.session.client.api_db.items.find({}):
-            result.append(ItemModel.from_mongo(item))
+        async with await client.start_session(snapshot=config.export_snapshot) as session:
+            cursor = self.collection.find({}, batch_size=batch_size, session=session,
+                                          comment=REQUEST_ID.get()).sort('_id', ASCENDING)
 
-        return result
+            async for item in cursor:
+                yield ItemModel.from_mongo(item)
 
     # ---------------------------------------------------------
     #
-    async def read(self, key: UUID) -> ItemModel:
+    async def read(self, key: UUID, fields: Optional[Set[str]] = None) -> ItemModel:
         """ Read Item for a matching index key from DB collection api_db.items.
 
+        The Item cache is used for complete Items when it's available.
+
         :param key: Index key.
+        :param fields: Possible selected Item fields (default is all).
         :return: Found Item.
         """
-        response = await self.session.client.api_db.items.find_one({"_id": str(key)})
+        if fields is not None:
+            response = await self.collection.find_one(
+                {"_id": str(key)}, projection=self._projection(fields),
+                **self._options())
+            return PartialItemModel.from_mongo(response)
 
-        return ItemModel.from_mongo(response)
+        if self.cache is not None and (item := self.cache.get(key)):
+            return item
+
+        response = await self.collection.find_one({"_id": str(key)},
+                                                  **self._options())
+        item = ItemModel.from_mongo(response)
+
+        if self.cache is not None and item:
+            self.cache.put(item)
+
+        return item
 
     # ---------------------------------------------------------
     #
-    async def query(self, arguments: QueryArguments) -> List[ItemModel]:
-        """ Read all Items that match the query arguments from DB collection api_db.items.
+    async def exists(self, key: UUID) -> bool:
+        """ Check if an Item with a matching index key exists in DB collection api_db.items.
 
-        :param arguments: Search arguments.
-        :return: List of found Items.
+        This is a covered query, it's answered by the _id index alone.
+
+        :param key: Index key.
+        :return: Existence status.
         """
-        result = []
+        if self.cache is not None and self.cache.get(key):
+            return True
 
-        async for item in self.session.client.api_db.items.find({}):
+        response = await self.collection.find_one(
+            {"_id": str(key)}, projection={'_id': 1}, **self._options())
 
-            if self._match(item, arguments):
-                result.append(ItemModel.from_mongo(item))
+        return response is not None
 
-        return result
+    # ---------------------------------------------------------
+    #
+    async def query(self, arguments: QueryArguments, limit: int,
+                    after: Optional[UUID] = None,
+                    fields: Optional[Set[str]] = None) -> List[ItemModel]:
+        """ Read a page of Items that match the query arguments from DB collection api_db.items.
+
+        :param arguments: Search arguments.
+        :param limit: Maximum number of Items to read.
+        :param after: Index key of the last Item on the previous page.
+        :param fields: Possible selected Item fields (default is all).
+        :return: List of found Items, in index key order.
+        """
+        collation = (NAME_COLLATION if arguments.name is not None else None)
+        query = self._page_filter(self._query_filter(arguments), after)
+        cursor = self.collection.find(
+            query, projection=self._projection(fields), collation=collation,
+            **self._options()
+        ).sort('_id', ASCENDING).limit(limit)
+
+        return [self._to_model(item, fields) async for item in cursor]
 
     # ---------------------------------------------------------
     #
-    async def update(self, payload: ItemModel) -> bool:
-        """ Update Item in DB collection api_db.items.
+    async def update(self, key: UUID, arguments: UpdateArguments) -> Optional[ItemModel]:
+        """ Update Item for a matching index key in DB collection api_db.items.
+
+        Only the changed values are sent, and the updated Item is returned
+        by the same DB operation. A rejected update, like a document that
+        fails the $jsonSchema validation, is reported as a 400.
 
-        :param payload: Updated Item payload.
-        :return: DB update result.
+        :param key: Index key.
+        :param arguments: Changed Item values.
+        :return: Updated Item, or None when it's not found.
+        :except HTTPException (400): Update failed for item_id in collection api_db.items.
         """
-        key = payload.id
-        base = ItemPayload(**payload.dict())
-        response = await self.session.client.api_db.items.update_one({"_id": str(key)},
-                                                                     {"$set": {**base.dict()}})
+        try:
+            response = await self.collection.find_one_and_update(
+                {"_id": str(key)}, {"$set": arguments.model_dump(exclude_none=True)},
+                return_document=ReturnDocument.AFTER, **self._options())
+
+        except OperationFailure as why:
+            errmsg = f"Failed updating id='{key}' in api_db.items: {why}"
+            raise HTTPException(status_code=400, detail=errmsg)
+
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(key)
 
-        return response.raw_result['updatedExisting']
+        return ItemModel.from_mongo(response)
 
     # ---------------------------------------------------------
     #
@@ -148,4 +352,10 @@ class ItemCrud:
         :param key: Index key.
         :return: DB delete result.
         """
-        return await self.session.client.api_db.items.delete_one({"_id": str(key)})
+        try:
+            return await self.collection.delete_one({"_id": str(key)},
+                                                    **self._options())
+
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(key)
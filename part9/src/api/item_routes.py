@@ -12,28 +12,61 @@ VERSION INFO::
 
 # BUILTIN modules
 from uuid import UUID
-from typing import List
+from typing import Any, Dict, List, Set, Optional
 
 # Third party modules
-from fastapi.responses import Response
-from fastapi import HTTPException, APIRouter, status, Depends, Query
+from pydantic import ValidationError
+from fastapi.responses import Response, StreamingResponse
+from fastapi import (HTTPException, APIRouter, status, Depends,
+                     Query, Request, Header, Body)
 
 # Local modules
 from .interface import ICrudRepository
+from .pagination import decode_cursor, next_page
+from .serialization import ITEM_LIST, json_bytes_response
+from .export import (ndjson_chunks, csv_chunks,
+                     NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE)
 from .dependencies import get_repository_crud
+from ..config.setup import config
 from ..security import validate_authentication
-from .documentation import (item_id_documentation,
+from .documentation import (item_id_documentation, fields_documentation,
                             get_query_documentation as get_query_doc,
-                            put_query_documentation as put_query_doc)
-from ..schemas import (Category, ItemPayload, ItemModel, QueryArguments,
-                       ItemArgumentResponse, DbOperationFailedError,
-                       NotFoundError, NoArgumentError)
+                            put_query_documentation as put_query_doc,
+                            page_query_documentation as page_query_doc,
+                            export_query_documentation as export_query_doc)
+from ..schemas import (Category, ItemPayload, ItemModel, PartialItemModel,
+                       QueryArguments, UpdateArguments, ItemArgumentResponse,
+                       BulkItemError, BulkCreateResponse, DbOperationFailedError,
+                       InvalidCursorError, NotFoundError, NoArgumentError)
 
 # Constants
 ROUTER = APIRouter(prefix="/v1/items", tags=["Items"],
                    dependencies=[Depends(validate_authentication)])
 
 
+# ---------------------------------------------------------
+#
+def _selected_fields(fields: Optional[str]) -> Optional[Set[str]]:
+    """ Return the selected item fields from the fields URL parameter.
+
+    :param fields: Possible comma separated item fields.
+    :return: Selected item fields, or None for all fields.
+    """
+    return (None if fields is None else set(fields.split(',')))
+
+
+# ---------------------------------------------------------
+#
+def _validation_detail(why: ValidationError) -> str:
+    """ Return the validation errors of a bulk item as one line.
+
+    :param why: Item validation error.
+    :return: Semicolon separated field errors.
+    """
+    return '; '.join(f"{'.'.join(map(str, error['loc'])) or 'item'}: {error['msg']}"
+                     for error in why.errors())
+
+
 # ---------------------------------------------------------
 #
 @ROUTER.post(
@@ -49,47 +82,175 @@ async def add_item(
     """  ***Add Item to api_db.items.***
 
     :param payload: A new item to be added.
-    :param crud: Item CRUD object with an active DB session.
+    :param crud: Item CRUD object.
     :return: Supplied item.
     """
     return await crud.create(payload)
 
 
+# ---------------------------------------------------------
+#
+@ROUTER.post(
+    "/bulk",
+    response_model=BulkCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def add_items(
+        payloads: List[Dict[str, Any]] = Body(
+            ..., max_length=config.bulk_max_items,
+            json_schema_extra={'items': {'$ref': '#/components/schemas/ItemPayload'}},
+            description="New items, every item is validated on its own"),
+        crud: ICrudRepository = Depends(get_repository_crud)
+) -> BulkCreateResponse:
+    """  ***Add many Items to api_db.items.***
+
+    Items that fail are reported per item, by their position in the
+    payload, and do not stop the other items from being added. Every
+    item is validated on its own, so an invalid item is reported like
+    an item that the DB rejects, with a null id.
+
+    :param payloads: New items to be added.
+    :param crud: Item CRUD object.
+    :return: Created item ids and failed items.
+    """
+    valid = {}
+    errors = []
+
+    for index, payload in enumerate(payloads):
+        try:
+            valid[index] = ItemPayload.model_validate(payload)
+
+        except ValidationError as why:
+            errors.append(BulkItemError(index=index, detail=_validation_detail(why)))
+
+    response = await crud.create_many(list(valid.values()))
+    positions = list(valid)
+    ids: List[Optional[UUID]] = [None] * len(payloads)
+
+    for position, key in zip(positions, response.ids):
+        ids[position] = key
+
+    errors.extend(BulkItemError(index=positions[error.index], detail=error.detail)
+                  for error in response.errors)
+
+    return BulkCreateResponse(ids=ids, errors=sorted(errors, key=lambda error: error.index))
+
+
 # ---------------------------------------------------------
 #
 @ROUTER.get(
     "",
-    response_model=List[ItemModel],
+    response_model=List[PartialItemModel],
+    responses={400: {"model": InvalidCursorError}},
 )
 async def get_all_items(
+        request: Request,
+        response: Response,
+        limit: int = Query(**page_query_doc['limit']),
+        after: str = Query(**page_query_doc['after']),
+        fields: str = fields_documentation,
         crud: ICrudRepository = Depends(get_repository_crud)
-) -> List[ItemModel]:
-    """ ***Read all Items from api_db.items.***
+) -> List[PartialItemModel]:
+    """ ***Read a page of Items from api_db.items.***
+
+    The URL of the next page is returned in the `Link` header.
+    When the fast_serialization config parameter is set, the items
+    are serialized straight to JSON without response validation.
+
+    :param request: Current request.
+    :param response: Current response.
+    :param limit: Page size.
+    :param after: Possible cursor from the previous page.
+    :param fields: Possible comma separated item fields to return.
+    :param crud: Item CRUD object.
+    :return: A page of items in the database.
+    """
+    items = await crud.read_all(limit, decode_cursor(after), _selected_fields(fields))
+    next_page(items, limit, request, response)
+
+    if config.fast_serialization:
+        return json_bytes_response(ITEM_LIST.dump_json(items), response)
 
-    :param crud: Item CRUD object with an active DB session.
-    :return: All items in the database.
+    return items
+
+
+# ---------------------------------------------------------
+#
+@ROUTER.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}, CSV_MEDIA_TYPE: {}},
+                     "description": "All items as NDJSON or CSV."}},
+)
+async def export_items(
+        accept: str = Header(NDJSON_MEDIA_TYPE),
+        batch_size: int = Query(**export_query_doc['batch_size']),
+        crud: ICrudRepository = Depends(get_repository_crud)
+) -> StreamingResponse:
+    """ ***Stream all Items from api_db.items.***
+
+    The items are returned as NDJSON, or as CSV when the `Accept`
+    header asks for `text/csv`. The response is streamed while the
+    items are read from the DB, so it starts immediately and uses
+    a constant amount of memory.
+
+    :param accept: Requested media type.
+    :param batch_size: Number of items fetched and written at a time.
+    :param crud: Item CRUD object.
+    :return: Streamed items.
+    """
+    items = crud.stream(batch_size)
+
+    if CSV_MEDIA_TYPE in accept:
+        return StreamingResponse(csv_chunks(items, batch_size),
+                                 media_type=CSV_MEDIA_TYPE)
+
+    return StreamingResponse(ndjson_chunks(items, batch_size),
+                             media_type=NDJSON_MEDIA_TYPE)
+
+
+# ---------------------------------------------------------
+#
+@ROUTER.head(
+    "/{item_id}",
+    responses={404: {"description": "Item not found in DB"}},
+)
+async def item_exists(
+        item_id: UUID = item_id_documentation,
+        crud: ICrudRepository = Depends(get_repository_crud)
+):
+    """ ***Check if Item for matching item_id exists in api_db.items.***
+
+    :param item_id: Item identifier.
+    :param crud: Item CRUD object.
+    :return: No response content.
     """
-    return await crud.read_all()
+    if not await crud.exists(item_id):
+        raise HTTPException(status_code=404, detail=f"{item_id=} not found in api_db.items")
+
+    return Response(status_code=status.HTTP_200_OK)
 
 
 # ---------------------------------------------------------
 #
 @ROUTER.get(
     "/{item_id}",
-    response_model=ItemModel,
+    response_model=PartialItemModel,
     responses={404: {"model": NotFoundError}},
 )
 async def query_item_by_id(
         item_id: UUID = item_id_documentation,
+        fields: str = fields_documentation,
         crud: ICrudRepository = Depends(get_repository_crud)
-) -> ItemModel:
+) -> PartialItemModel:
     """ ***Read Item for matching item_id from api_db.items.***
 
     :param item_id: Item identifier.
-    :param crud: Item CRUD object with an active DB session.
+    :param fields: Possible comma separated item fields to return.
+    :param crud: Item CRUD object.
     :return: Found item.
     """
-    response = await crud.read(item_id)
+    response = await crud.read(item_id, _selected_fields(fields))
 
     if not response:
         errmsg = f"{item_id=} not found in api_db.items"
@@ -103,25 +264,39 @@ async def query_item_by_id(
 @ROUTER.get(
     "/",
     response_model=ItemArgumentResponse,
-    responses={406: {"model": NoArgumentError}},
+    responses={
+        400: {"model": InvalidCursorError},
+        406: {"model": NoArgumentError}},
 )
 async def query_item_by_parameters(
+        request: Request,
+        response: Response,
         name: str = Query(**get_query_doc['name']),
         count: int = Query(**get_query_doc['count']),
         price: float = Query(**get_query_doc['price']),
         category: Category = Query(**get_query_doc['category']),
+        limit: int = Query(**page_query_doc['limit']),
+        after: str = Query(**page_query_doc['after']),
+        fields: str = fields_documentation,
         crud: ICrudRepository = Depends(get_repository_crud)
 ) -> ItemArgumentResponse:
     """ ***Read item(s) using URL query parameters.***
 
-    Note that this is a non-indexed search that traverses all Items
-    in the collection to find the Items that match the search criteria.
+    Note that the search criteria are sent to MongoDB as a query filter,
+    so only the matching Items leave the server. The name match is
+    case-insensitive. The result is paginated and serialized like
+    get_all_items().
 
+    :param request: Current request.
+    :param response: Current response.
     :param name: Possible name parameter.
     :param count: Possible count parameter.
     :param price: Possible price parameter.
     :param category: Possible category parameter.
-    :param crud: Item CRUD object with an active DB session.
+    :param limit: Page size.
+    :param after: Possible cursor from the previous page.
+    :param fields: Possible comma separated item fields to return.
+    :param crud: Item CRUD object.
     :return: Found item.
     """
     # Verify that at least one of the query parameters has a value since
@@ -131,9 +306,15 @@ async def query_item_by_parameters(
         raise HTTPException(status_code=406, detail=errmsg)
 
     arguments = QueryArguments(name=name, price=price, count=count, category=category)
-    response = await crud.query(arguments)
+    items = await crud.query(arguments, limit, decode_cursor(after), _selected_fields(fields))
+    cursor = next_page(items, limit, request, response)
+
+    if config.fast_serialization:
+        result = ItemArgumentResponse.model_construct(query=arguments, next_cursor=cursor,
+                                                      selection=items)
+        return json_bytes_response(result.model_dump_json(), response)
 
-    return ItemArgumentResponse(query=arguments, selection=response)
+    return ItemArgumentResponse(query=arguments, next_cursor=cursor, selection=items)
 
 
 # ---------------------------------------------------------
@@ -159,7 +340,7 @@ async def update_item(
     :param name: Possible name for the item.
     :param count: Possible count for the item.
     :param price: Possible price for the item.
-    :param crud: Item CRUD object with an active DB session.
+    :param crud: Item CRUD object.
     :return: Updated item.
     """
     # Verify that at least one of the query parameters has
@@ -168,25 +349,13 @@ async def update_item(
         errmsg = "No query values provided in update URL"
         raise HTTPException(status_code=406, detail=errmsg)
 
-    response = await crud.read(item_id)
+    arguments = UpdateArguments(name=name, price=price, count=count)
+    response = await crud.update(item_id, arguments)
 
     if not response:
         errmsg = f"{item_id=} not found in api_db.items"
         raise HTTPException(status_code=404, detail=errmsg)
 
-    if name is not None:
-        response.name = name
-    if price is not None:
-        response.price = price
-    if count is not None:
-        response.count = count
-
-    successful = await crud.update(response)
-
-    if not successful:
-        errmsg = f"Failed updating {item_id=} in api_db.items"
-        raise HTTPException(status_code=400, detail=errmsg)
-
     return response
 
 
@@ -205,7 +374,7 @@ async def delete_item(
     """ ***Delete Item for matching item_id from api_db.items.***
 
     :param item_id: Item identifier.
-    :param crud: Item CRUD object with an active DB session.
+    :param crud: Item CRUD object.
     :return: No response content (custom for a deleted item).
     """
     response = await crud.delete(item_id)
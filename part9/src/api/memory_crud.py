@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+from enum import Enum
+from uuid import UUID
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple, Union, Optional, AsyncIterator
+
+# Third party modules
+from pymongo.results import DeleteResult
+
+# Local modules
+from .item_crud import ItemCrud
+from ..schemas import (ItemPayload, ItemModel, PartialItemModel, QueryArguments,
+                       UpdateArguments, BulkCreateResponse)
+
+# Constants
+HASH_INDEXES = ('category', 'name')
+""" Item fields with a hash index, the name is indexed in lowercase. """
+SORTED_INDEXES = ('price', 'count')
+""" Item fields with a sorted index. """
+
+
+# -----------------------------------------------------------------------------
+#
+class InMemoryItemCrud:
+    """ Item CRUD operations on an in-process Item store.
+
+    This class implements the ICrudRepository protocol without a DB, for
+    offline load testing, benchmarking, fast tests and deployments
+    without MongoDB. The Items are kept as DB documents and converted
+    like ItemCrud does, so the per-document work matches the MongoDB
+    backend. One instance holds the store, and it's shared between
+    requests.
+
+    Every query field is indexed, so a query never scans the store:
+    category and lowercased name have hash indexes, and price and count
+    have sorted indexes of (value, key) pairs. The index keys are kept
+    sorted, for the key order of the pages.
+
+    :ivar collection: Not used, there is no DB collection.
+    :ivar session: Not used, there is no DB session.
+    :ivar items: Item documents, per index key string.
+    """
+    collection = None
+    session = None
+
+    def __init__(self):
+        """ Implicit constructor. """
+        self.items: Dict[str, dict] = {}
+        self._keys: List[str] = []
+        self._hashed: Dict[str, Dict[str, Set[str]]] = {
+            field: defaultdict(set) for field in HASH_INDEXES}
+        self._sorted: Dict[str, List[Tuple[float, str]]] = {
+            field: [] for field in SORTED_INDEXES}
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _to_document(db_item: ItemModel) -> dict:
+        """ Return the Item as a document, with the values the DB would store.
+
+        :param db_item: Item.
+        :return: Item document.
+        """
+        return {key: (value.value if isinstance(value, Enum) else value)
+                for key, value in db_item.to_mongo().items()}
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _to_model(document: dict,
+                  fields: Optional[Set[str]]) -> Union[ItemModel, PartialItemModel]:
+        """ Return a copy of the Item document as an Item model.
+
+        :param document: Item document.
+        :param fields: Possible selected Item fields.
+        :return: Complete Item, or partial Item when fields are selected.
+        """
+        if fields is None:
+            return ItemModel.from_mongo(dict(document))
+
+        return PartialItemModel.from_mongo({key: document[key]
+                                            for key in ItemCrud._projection(fields)})
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _hash_value(field: str, value: str) -> str:
+        """ Return the hash index value, the name comparison is case-insensitive.
+
+        :param field: Indexed Item field.
+        :param value: Item field value.
+        :return: Index value.
+        """
+        return value.lower() if field == 'name' else value
+
+    # ---------------------------------------------------------
+    #
+    def _add(self, key: str, document: dict):
+        """ Add the Item document to the store and the indexes.
+
+        :param key: Index key string.
+        :param document: Item document.
+        """
+        self.items[key] = document
+        insort(self._keys, key)
+
+        for field, index in self._hashed.items():
+            index[self._hash_value(field, document[field])].add(key)
+
+        for field, index in self._sorted.items():
+            insort(index, (document[field], key))
+
+    # ---------------------------------------------------------
+    #
+    def _remove(self, key: str) -> Optional[dict]:
+        """ Remove the Item document from the store and the indexes.
+
+        :param key: Index key string.
+        :return: Removed Item document, or None when it's not found.
+        """
+        document = self.items.pop(key, None)
+
+        if document is None:
+            return None
+
+        del self._keys[bisect_left(self._keys, key)]
+
+        for field, index in self._hashed.items():
+            value = self._hash_value(field, document[field])
+            index[value].discard(key)
+
+            if not index[value]:
+                del index[value]
+
+        for field, index in self._sorted.items():
+            del index[bisect_left(index, (document[field], key))]
+
+        return document
+
+    # ---------------------------------------------------------
+    #
+    def _lookup(self, field: str, value) -> Set[str]:
+        """ Return the index keys of the Items with the field value.
+
+        :param field: Indexed Item field.
+        :param value: Searched value.
+        :return: Matching index key strings.
+        """
+        if field in self._hashed:
+            return self._hashed[field].get(self._hash_value(field, value), set())
+
+        index = self._sorted[field]
+        first = bisect_left(index, value, key=itemgetter(0))
+        last = bisect_right(index, value, lo=first, key=itemgetter(0))
+        return {key for _, key in index[first:last]}
+
+    # ---------------------------------------------------------
+    #
+    def _page(self, query: dict, limit: int, after: Optional[UUID],
+              fields: Optional[Set[str]]) -> List[ItemModel]:
+        """ Return a page of matching Items, in index key order.
+
+        The index lookups are intersected smallest first, so the
+        work depends on the number of matches, not the store size.
+
+        :param query: Query filter from ItemCrud._query_filter().
+        :param limit: Maximum number of Items to read.
+        :param after: Index key of the last Item on the previous page.
+        :param fields: Possible selected Item fields.
+        :return: List of found Items.
+        """
+        keys = self._keys
+
+        if query:
+            matches = sorted((self._lookup(field, value) for field, value in query.items()),
+                             key=len)
+            keys = sorted(matches[0].intersection(*matches[1:]))
+
+        start = 0 if after is None else bisect_right(keys, str(after))
+        return [self._to_model(self.items[key], fields)
+                for key in keys[start:start + limit]]
+
+    # ---------------------------------------------------------
+    #
+    async def create(self, payload: ItemPayload) -> ItemModel:
+        """ Create Item in the store.
+
+        :param payload: New Item payload.
+        :return: Created Item.
+        """
+        db_item = ItemModel(**payload.model_dump())
+        self._add(str(db_item.id), self._to_document(db_item))
+        return db_item
+
+    # ---------------------------------------------------------
+    #
+    async def create_many(self, payloads: List[ItemPayload]) -> BulkCreateResponse:
+        """ Create Items in the store.
+
+        :param payloads: New Item payloads.
+        :return: Created Item ids, there are no failed Items.
+        """
+        db_items = [ItemModel(**payload.model_dump()) for payload in payloads]
+
+        for db_item in db_items:
+            self._add(str(db_item.id), self._to_document(db_item))
+
+        return BulkCreateResponse(ids=[db_item.id for db_item in db_items], errors=[])
+
+    # ---------------------------------------------------------
+    #
+    async def read_all(self, limit: int, after: Optional[UUID] = None,
+                       fields: Optional[Set[str]] = None) -> List[ItemModel]:
+        """ Read a page of existing Items in the store.
+
+        :param limit: Maximum number of Items to read.
+        :param after: Index key of the last Item on the previous page.
+        :param fields: Possible selected Item fields (default is all).
+        :return: List of found Items, in index key order.
+        """
+        return self._page({}, limit, after, fields)
+
+    # ---------------------------------------------------------
+    #
+    async def stream(self, batch_size: int) -> AsyncIterator[ItemModel]:
+        """ Iterate over all existing Items in the store.
+
+        :param batch_size: Not used, all Items are in memory.
+        :return: Async iterator of Items, in index key order.
+        """
+        for key in list(self._keys):
+            document = self.items.get(key)
+
+            if document is not None:
+                yield ItemModel.from_mongo(dict(document))
+
+    # ---------------------------------------------------------
+    #
+    async def read(self, key: UUID, fields: Optional[Set[str]] = None) -> ItemModel:
+        """ Read Item for a matching index key from the store.
+
+        :param key: Index key.
+        :param fields: Possible selected Item fields (default is all).
+        :return: Found Item.
+        """
+        document = self.items.get(str(key))
+        return None if document is None else self._to_model(document, fields)
+
+    # ---------------------------------------------------------
+    #
+    async def exists(self, key: UUID) -> bool:
+        """ Check if an Item with a matching index key exists in the store.
+
+        :param key: Index key.
+        :return: Existence status.
+        """
+        return str(key) in self.items
+
+    # ---------------------------------------------------------
+    #
+    async def query(self, arguments: QueryArguments, limit: int,
+                    after: Optional[UUID] = None,
+                    fields: Optional[Set[str]] = None) -> List[ItemModel]:
+        """ Read a page of Items that match the query arguments from the store.
+
+        :param arguments: Search arguments.
+        :param limit: Maximum number of Items to read.
+        :param after: Index key of the last Item on the previous page.
+        :param fields: Possible selected Item fields (default is all).
+        :return: List of found Items, in index key order.
+        """
+        return self._page(ItemCrud._query_filter(arguments), limit, after, fields)
+
+    # ---------------------------------------------------------
+    #
+    async def update(self, key: UUID, arguments: UpdateArguments) -> Optional[ItemModel]:
+        """ Update Item for a matching index key in the store.
+
+        :param key: Index key.
+        :param arguments: Changed Item values.
+        :return: Updated Item, or None when it's not found.
+        """
+        document = self._remove(str(key))
+
+        if document is None:
+            return None
+
+        document.update(arguments.model_dump(exclude_none=True))
+        self._add(str(key), document)
+        return ItemModel.from_mongo(dict(document))
+
+    # ---------------------------------------------------------
+    #
+    async def delete(self, key: UUID) -> DeleteResult:
+        """ Delete Item for a matching index key from the store.
+
+        :param key: Index key.
+        :return: Delete result.
+        """
+        deleted = self._remove(str(key)) is not None
+        return DeleteResult({'n': int(deleted)}, acknowledged=True)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# Third party modules
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+# local modules
+from ..db import POOL_MONITOR
+from .dependencies import ITEM_CACHE
+from ..metrics import StatsPublisher, metrics_registry
+
+# Constants
+ROUTER = APIRouter(prefix="/metrics", tags=["Metrics endpoint"])
+""" Metrics API endpoint router. """
+STATS = StatsPublisher(POOL_MONITOR, ITEM_CACHE)
+""" Connection pool and Item cache metrics publisher. """
+
+
+# ---------------------------------------------------------
+#
+@ROUTER.get('', response_class=Response)
+async def metrics() -> Response:
+    """ ***Return the service metrics in Prometheus text format.*** """
+    STATS.publish()
+
+    return Response(content=generate_latest(metrics_registry()),
+                    media_type=CONTENT_TYPE_LATEST)
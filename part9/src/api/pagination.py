@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+from uuid import UUID
+from typing import List, Optional
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+# Third party modules
+from fastapi import HTTPException, Request, Response
+
+# Local modules
+from ..schemas import ItemModel
+
+
+# ---------------------------------------------------------
+#
+def encode_cursor(key: UUID) -> str:
+    """ Return an opaque page cursor for the index key.
+
+    :param key: Index key of the last Item on a page.
+    :return: Opaque page cursor.
+    """
+    return urlsafe_b64encode(key.bytes).decode().rstrip('=')
+
+
+# ---------------------------------------------------------
+#
+def decode_cursor(cursor: Optional[str]) -> Optional[UUID]:
+    """ Return the index key that the page cursor refers to.
+
+    :param cursor: Opaque page cursor.
+    :return: Index key of the last Item on the previous page.
+    :raise HTTPException (400): When the cursor is invalid.
+    """
+    if cursor is None:
+        return None
+
+    try:
+        return UUID(bytes=urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid page cursor {cursor=}")
+
+
+# ---------------------------------------------------------
+#
+def next_page(items: List[ItemModel], limit: int,
+              request: Request, response: Response) -> Optional[str]:
+    """ Return the next page cursor and add it as a Link header.
+
+    A full page means that there might be more Items, so a cursor is
+    only returned for a full page. That means the last page can be
+    empty when the number of Items is a multiple of the page size.
+
+    :param items: Items on the current page.
+    :param limit: Page size.
+    :param request: Current request.
+    :param response: Current response.
+    :return: Next page cursor, or None on the last page.
+    """
+    if not items or len(items) < limit:
+        return None
+
+    cursor = encode_cursor(items[-1].id)
+    url = request.url.include_query_params(after=cursor)
+    response.headers['Link'] = f'<{url}>; rel="next"'
+
+    return cursor
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+from typing import List
+
+# Third party modules
+from fastapi import Response
+from pydantic import TypeAdapter, SerializeAsAny
+
+# Local modules
+from ..schemas import PartialItemModel
+
+# Constants
+ITEM_LIST = TypeAdapter(List[SerializeAsAny[PartialItemModel]])
+""" Cached Item list serializer, every Item is serialized by its own model. """
+
+
+# ---------------------------------------------------------
+#
+def json_bytes_response(content: bytes, response: Response) -> Response:
+    """ Return a response with already serialized JSON content.
+
+    This is the fast serialization path. Returning a Response object
+    makes FastAPI skip the response_model validation and the JSON
+    encoding of the returned value, so the content must already match
+    the response_model.
+
+    :param content: Serialized JSON content.
+    :param response: Current response, with possible extra headers.
+    :return: JSON response.
+    """
+    return Response(content=content, media_type='application/json',
+                    headers=dict(response.headers))
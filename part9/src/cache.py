@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import time
+from uuid import UUID
+from typing import Optional, NamedTuple
+from collections import OrderedDict
+
+# Local modules
+from .schemas import ItemModel
+
+
+# ---------------------------------------------------------
+#
+class CacheStats(NamedTuple):
+    """ Item cache counters.
+
+    :ivar size: Number of cached Items.
+    :ivar hits: Number of reads found in the cache.
+    :ivar misses: Number of reads not found in the cache.
+    :ivar evictions: Number of Items removed to make room for new ones.
+    :ivar expirations: Number of Items removed since they were too old.
+    :ivar invalidations: Number of Items removed since they were changed.
+    """
+    size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+# -----------------------------------------------------------------------------
+#
+class ItemCache:
+    """ Bounded in-process Item cache with LRU eviction and a TTL.
+
+    Note that cached Items are shared between requests, so they must
+    not be modified by the caller.
+
+    :ivar max_size: Maximum number of cached Items.
+    :ivar ttl: Number of seconds an Item stays in the cache.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        """ Implicit constructor.
+
+        :param max_size: Maximum number of cached Items.
+        :param ttl: Number of seconds an Item stays in the cache.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._hits = self._misses = 0
+        self._evictions = self._expirations = self._invalidations = 0
+
+    # ---------------------------------------------------------
+    #
+    def get(self, key: UUID) -> Optional[ItemModel]:
+        """ Return the cached Item for the index key.
+
+        :param key: Index key.
+        :return: Cached Item, or None when it's missing or too old.
+        """
+        entry = self._items.get(key)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires, item = entry
+
+        if expires < time.monotonic():
+            del self._items[key]
+            self._expirations += 1
+            self._misses += 1
+            return None
+
+        self._items.move_to_end(key)
+        self._hits += 1
+        return item
+
+    # ---------------------------------------------------------
+    #
+    def put(self, item: ItemModel):
+        """ Add the Item to the cache, evicting the least recently used Item when full.
+
+        :param item: Item to cache.
+        """
+        self._items[item.id] = (time.monotonic() + self.ttl, item)
+        self._items.move_to_end(item.id)
+
+        if len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self._evictions += 1
+
+    # ---------------------------------------------------------
+    #
+    def invalidate(self, key: UUID):
+        """ Remove the Item for the index key from the cache.
+
+        :param key: Index key.
+        """
+        if self._items.pop(key, None) is not None:
+            self._invalidations += 1
+
+    # ---------------------------------------------------------
+    #
+    def clear(self):
+        """ Remove all Items from the cache. """
+        self._invalidations += len(self._items)
+        self._items.clear()
+
+    # ---------------------------------------------------------
+    #
+    def stats(self) -> CacheStats:
+        """ Return the cache counters.
+
+        :return: Cache counters.
+        """
+        return CacheStats(size=len(self._items), hits=self._hits,
+                          misses=self._misses, evictions=self._evictions,
+                          expirations=self._expirations,
+                          invalidations=self._invalidations)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import asyncio
+from uuid import UUID
+
+# Third party modules
+from loguru import logger
+from pymongo.errors import PyMongoError, OperationFailure
+
+# Local modules
+from .db import Engine
+from .cache import ItemCache
+from .config.setup import config
+
+# Constants
+CHANGED = {'update', 'replace', 'delete'}
+""" Change events that make a cached Item stale. """
+HISTORY_LOST = 286
+""" MongoDB error code when a resume token is no longer in the oplog. """
+
+
+# -----------------------------------------------------------------------------
+#
+class CacheWatcher:
+    """ Keep the Item cache in sync with writes from all workers and pods.
+
+    A change stream on api_db.items removes changed Items from the cache.
+    The resume token is kept, so that the stream continues where it left
+    off after a connection failure. When that's not possible the whole
+    cache is cleared, since changes might have been missed.
+
+    Note that change streams require a replica set or a sharded cluster.
+
+    :ivar cache: Watched Item cache.
+    :ivar resume_token: Change stream position.
+    """
+
+    def __init__(self, cache: ItemCache):
+        """ Implicit constructor.
+
+        :param cache: Watched Item cache.
+        """
+        self.cache = cache
+        self.resume_token = None
+
+    # ---------------------------------------------------------
+    #
+    def _handle(self, change: dict) -> bool:
+        """ Update the cache for a change event.
+
+        :param change: Change stream event.
+        :return: True when the stream can continue after this event.
+        """
+        if change['operationType'] in CHANGED:
+            self.cache.invalidate(UUID(change['documentKey']['_id']))
+
+        # The collection is gone (drop, rename, dropDatabase or
+        # invalidate), and the stream ends after these events.
+        elif change['operationType'] != 'insert':
+            self.cache.clear()
+            return False
+
+        return True
+
+    # ---------------------------------------------------------
+    #
+    async def run(self):
+        """ Watch api_db.items changes until the task is cancelled.
+
+        The resume token is updated after every batch, including empty
+        ones, so it stays valid even when the collection is idle.
+        """
+
+        while True:
+            # Without a resume token, the changes made while
+            # the stream was down are unknown.
+            if self.resume_token is None:
+                self.cache.clear()
+
+            try:
+                async with Engine.db.items.watch(resume_after=self.resume_token) as stream:
+                    while stream.alive:
+                        change = await stream.try_next()
+
+                        if change is not None and not self._handle(change):
+                            self.resume_token = None
+                            break
+
+                        self.resume_token = stream.resume_token
+
+            except OperationFailure as why:
+                if why.code == HISTORY_LOST:
+                    logger.warning('Item cache change stream history is lost.')
+                    self.resume_token = None
+
+                else:
+                    logger.error(f'Item cache change stream failed: {why}.')
+
+                await asyncio.sleep(config.item_cache_watch_retry)
+
+            except PyMongoError as why:
+                logger.error(f'Item cache change stream failed: {why}.')
+                await asyncio.sleep(config.item_cache_watch_retry)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import os
+import shutil
+
+# Third party modules
+from prometheus_client import multiprocess
+
+# Local modules
+from .setup import config
+
+# Constants
+METRICS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+""" Directory for the multiprocess metric files.
+
+Every gunicorn worker writes its metrics to memory-mapped files in this
+directory (in /dev/shm, like the worker tmp dir), and the files are
+aggregated when the metrics are scraped. The hooks are loaded with
+the gunicorn -c=python:src.config.gunicorn_hooks option.
+"""
+
+
+# ---------------------------------------------------------
+#
+def on_starting(server):
+    """ Check the worker count and empty the metrics directory, before any worker is started.
+
+    The in-memory Item store is per worker process, so an Item created by
+    one worker is not found by the others. That combination is refused.
+    Metric files left by a previous run would otherwise be aggregated
+    as well.
+
+    :param server: Gunicorn arbiter.
+    :raises RuntimeError: When the in-memory Item store is used with more than one worker.
+    """
+    if config.item_repository == 'memory' and server.cfg.workers > 1:
+        raise RuntimeError(f'The in-memory Item store needs a single worker '
+                           f'(-w 1), not {server.cfg.workers}.')
+
+    if METRICS_DIR:
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+        os.makedirs(METRICS_DIR)
+
+
+# ---------------------------------------------------------
+#
+def child_exit(server, worker):
+    """ Remove the live gauge values of a dead worker.
+
+    The counters and histograms of the worker are kept, so that the
+    totals don't decrease when a worker is restarted.
+
+    :param server: Gunicorn arbiter.
+    :param worker: Dead worker.
+    """
+    if METRICS_DIR:
+        multiprocess.mark_process_dead(worker.pid, METRICS_DIR)
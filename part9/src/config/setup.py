@@ -14,6 +14,7 @@ VERSION INFO::
 import site
 from os import environ
 from pathlib import Path
+from typing import List, Literal, Optional
 
 # Third party modules
 from pydantic import Field
@@ -50,9 +51,82 @@ class Configuration(BaseSettings):
     log_format: str = MISSING_ENV
     log_diagnose: bool = ENVIRONMENT != 'prod'
 
+    # Production logging parameters (JSON records from a batched writer).
+    log_production: bool = ENVIRONMENT == 'prod'
+    log_queue_size: int = 10000
+    log_batch_size: int = 500
+
+    # Log volume parameters: the part of the access log records that is kept
+    # (errors and requests slower than log_slow_request seconds are always
+    # kept), and the seconds that repeated messages are collapsed (0 disables).
+    log_access_sample_rate: float = 1.0
+    log_slow_request: float = 1.0
+    log_repeat_window: float = 10.0
+
+    # Item repository backend: "mongo", or "memory" for an in-process
+    # store without MongoDB. The Items are lost at a restart, and every
+    # worker process has its own store, so it needs gunicorn -w 1 (the
+    # gunicorn_hooks refuse more workers).
+    item_repository: Literal['mongo', 'memory'] = 'mongo'
+
     # Database connection URL.
     mongo_url: str = Field(MISSING_SECRET, alias=f'mongo_url_{ENVIRONMENT}')
 
+    # Database connection pool parameters (an empty compressor list
+    # disables wire compression, zstd needs the zstandard package).
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 0
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_compressors: List[str] = []
+    mongo_server_selection_timeout_ms: int = 30000
+
+    # Use an in-process fake MongoDB client, for benchmarks and tests
+    # without a MongoDB server. Every DB round trip is delayed by the
+    # fake latency, in seconds.
+    mongo_fake: bool = False
+    mongo_fake_latency: float = 0.0
+
+    # Database index parameters (pruning drops every index that is not
+    # declared in ITEM_INDEXES, like TTL or DBA indexes, so it's opt-in).
+    mongo_index_prune: bool = False
+    mongo_index_background: bool = True
+
+    # Build Items from DB documents without validation, once a
+    # $jsonSchema validator guarantees that they are valid.
+    trusted_documents: bool = False
+
+    # Serialize item lists straight to JSON, without response validation.
+    fast_serialization: bool = True
+
+    # Pagination parameters.
+    page_size: int = 100
+    max_page_size: int = 1000
+
+    # Export parameters. A snapshot export needs a replica set, and it must
+    # finish within the server minSnapshotHistoryWindowInSeconds (300 by
+    # default), otherwise it's aborted after the response has started.
+    export_batch_size: int = 1000
+    export_snapshot: bool = False
+
+    # Bulk create parameters.
+    bulk_max_items: int = 10000
+    bulk_chunk_size: int = 1000
+
+    # Item cache parameters (a zero size disables the cache).
+    item_cache_size: int = 0
+    item_cache_ttl: float = 30.0
+    item_cache_watch_retry: float = 5.0
+
+    # Health parameters, in seconds.
+    health_probe_interval: float = 10.0
+    health_probe_timeout: float = 2.0
+    health_stale_after: float = 30.0
+
+    # Seconds between publishing the pool and cache metrics of
+    # a worker, when the metrics are shared between workers.
+    metrics_publish_interval: float = 5.0
+
     # Authentication.
     service_api_key: str = MISSING_SECRET
 
@@ -12,9 +12,16 @@ VERSION INFO::
 
 # BUILTIN modules
 import sys
+import json
+import time
+import queue
+import random
 import logging
-from typing import cast
+import threading
+import traceback
 from types import FrameType
+from typing import cast, TextIO, Optional
+from contextvars import ContextVar
 
 # Third party modules
 from loguru import logger
@@ -22,11 +29,39 @@ from loguru import logger
 # local modules
 from .config.setup import config
 
+# Constants
+REQUEST_ID: ContextVar[Optional[str]] = ContextVar('request_id', default=None)
+""" Identity of the current HTTP request. """
+REQUEST_METHOD: ContextVar[Optional[str]] = ContextVar('request_method', default=None)
+""" HTTP method of the current HTTP request. """
+REQUEST_START: ContextVar[Optional[float]] = ContextVar('request_start', default=None)
+""" Performance counter value when the current HTTP request started. """
+ACCESS_STATUS_ARG = 4
+""" Position of the status code in the uvicorn access log arguments. """
+
+_repeat_filter: Optional['RepeatFilter'] = None
+""" Repeat filter of the current unified logger, if any. """
+
 
 # ---------------------------------------------------------
 #
 class InterceptHandler(logging.Handler):
-    """ Send logs to loguru logging from Python logging module. """
+    """ Send logs to loguru logging from Python logging module.
+
+    Finding the caller of the original log call means walking the Python
+    frames for every record. In fast mode that is skipped, and the python
+    logger name is added to the record instead.
+
+    :ivar fast: Skip the frame walking.
+    """
+
+    def __init__(self, fast: bool = False):
+        """ Implicit constructor.
+
+        :param fast: Skip the frame walking.
+        """
+        super().__init__()
+        self.fast = fast
 
     def emit(self, record: logging.LogRecord):
         """  Move the specified logging record to loguru.
@@ -39,6 +74,11 @@ class InterceptHandler(logging.Handler):
         except ValueError:
             level = str(record.levelno)
 
+        if self.fast:
+            logger.opt(exception=record.exc_info).bind(logger=record.name).log(
+                level, record.getMessage())
+            return
+
         frame, depth = logging.currentframe(), 2
 
         while frame.f_code.co_filename == logging.__file__:
@@ -53,40 +93,350 @@ class InterceptHandler(logging.Handler):
         )
 
 
+# -----------------------------------------------------------------------------
+#
+class BatchedJsonSink:
+    """ Loguru sink that writes JSON records in batches from a writer thread.
+
+    The logging thread only puts the record in a bounded queue, while the
+    JSON encoding and the writing is done by the writer thread. When the
+    queue is full the record is dropped, and the number of dropped records
+    is reported by the writer thread.
+
+    :ivar stream: Output stream.
+    :ivar dropped: Number of dropped records.
+    :ivar batch_size: Maximum number of records in one write.
+    """
+
+    def __init__(self, stream: TextIO, max_size: int, batch_size: int):
+        """ Implicit constructor.
+
+        :param stream: Output stream.
+        :param max_size: Maximum number of queued records.
+        :param batch_size: Maximum number of records in one write.
+        """
+        self.dropped = 0
+        self.stream = stream
+        self.batch_size = batch_size
+        self._reported = 0
+        self._queue = queue.Queue(maxsize=max_size)
+        self._writer = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._writer.start()
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _to_json(record: dict) -> str:
+        """ Return the loguru record as a JSON line.
+
+        :param record: Loguru record.
+        :return: JSON line.
+        """
+        content = {'time': record['time'].isoformat(),
+                   'level': record['level'].name,
+                   'message': record['message'],
+                   'name': record['name'],
+                   'function': record['function'],
+                   'line': record['line'],
+                   **record['extra']}
+
+        if record['exception'] is not None:
+            content['exception'] = ''.join(traceback.format_exception(*record['exception']))
+
+        return json.dumps(content, default=str)
+
+    # ---------------------------------------------------------
+    #
+    def _dropped_record(self) -> str:
+        """ Return a JSON line that reports newly dropped records.
+
+        :return: JSON line, or an empty string when nothing is dropped.
+        """
+        dropped, self._reported = self.dropped - self._reported, self.dropped
+
+        if not dropped:
+            return ''
+
+        return json.dumps({'level': 'WARNING',
+                           'message': f'{dropped} log records dropped, '
+                                      f'{self._reported} in total'}) + '\n'
+
+    # ---------------------------------------------------------
+    #
+    def _run(self):
+        """ Write the queued records in batches until a None record is queued. """
+        running = True
+
+        while running:
+            batch = [self._queue.get()]
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+
+                except queue.Empty:
+                    break
+
+            if batch[-1] is None:
+                running = False
+                batch.pop()
+
+            lines = ''.join(self._to_json(record) + '\n' for record in batch)
+            self.stream.write(self._dropped_record() + lines)
+            self.stream.flush()
+
+    # ---------------------------------------------------------
+    #
+    def write(self, message):
+        """ Queue the loguru record, or drop it when the queue is full.
+
+        :param message: Loguru message.
+        """
+        try:
+            self._queue.put_nowait(message.record)
+
+        except queue.Full:
+            self.dropped += 1
+
+    # ---------------------------------------------------------
+    #
+    def stop(self):
+        """ Write the queued records and stop the writer thread. """
+        self._queue.put(None)
+        self._writer.join()
+
+
+# ---------------------------------------------------------
+#
+class AccessLogSampler(logging.Filter):
+    """ Keep a sample of the uvicorn access log records.
+
+    Error responses and slow requests are always kept. This is a python
+    logging filter, so a dropped record never reaches loguru.
+
+    :ivar rate: Part of the other records to keep (0.0 - 1.0).
+    :ivar slow_after: Number of seconds after which a request is slow.
+    """
+
+    def __init__(self, rate: float, slow_after: float):
+        """ Implicit constructor.
+
+        :param rate: Part of the other records to keep (0.0 - 1.0).
+        :param slow_after: Number of seconds after which a request is slow.
+        """
+        super().__init__()
+        self.rate = rate
+        self.slow_after = slow_after
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """ Return True when the access log record is kept.
+
+        :param record: Uvicorn access log record.
+        :return: Keep status.
+        """
+        args = record.args
+
+        if isinstance(args, tuple) and len(args) > ACCESS_STATUS_ARG \
+                and args[ACCESS_STATUS_ARG] >= 400:
+            return True
+
+        started = REQUEST_START.get()
+
+        if started is not None and time.perf_counter() - started >= self.slow_after:
+            return True
+
+        return random.random() < self.rate
+
+
+# -----------------------------------------------------------------------------
+#
+class RepeatFilter:
+    """ Loguru filter that collapses repeated identical messages.
+
+    The first occurrence of a message is logged, and the repetitions
+    within the window are counted instead. When the window has passed,
+    the number of repetitions is logged, either with the next occurrence
+    or by a flusher thread that checks the windows periodically. The
+    pending counts are also logged when the filter is stopped.
+
+    :ivar window: Number of seconds that repetitions are collapsed.
+    :ivar max_keys: Maximum number of tracked messages.
+    """
+
+    def __init__(self, window: float, max_keys: int = 1000):
+        """ Implicit constructor.
+
+        :param window: Number of seconds that repetitions are collapsed.
+        :param max_keys: Maximum number of tracked messages.
+        """
+        self.window = window
+        self.max_keys = max_keys
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._run, name='log-repeat-flusher',
+                                         daemon=True)
+        self._flusher.start()
+
+    def __call__(self, record: dict) -> bool:
+        """ Return True when the record is logged.
+
+        :param record: Loguru record.
+        :return: Log status.
+        """
+        if record['extra'].get('repeat_summary'):
+            return True
+
+        now = time.monotonic()
+        key = (record['level'].name, record['message'])
+
+        with self._lock:
+            entry = self._seen.get(key)
+
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                return False
+
+            if len(self._seen) >= self.max_keys:
+                self._seen = {key: value for key, value in self._seen.items()
+                              if now - value[0] < self.window}
+
+            self._seen[key] = [now, 0]
+
+        if entry is not None and entry[1]:
+            record['message'] += f' (repeated {entry[1]} times)'
+
+        return True
+
+    def flush(self, force: bool = False):
+        """ Log the repetition counts of the messages whose window has passed.
+
+        :param force: Log all pending repetition counts.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            expired = [(key, entry[1]) for key, entry in self._seen.items()
+                       if entry[1] and (force or now - entry[0] >= self.window)]
+
+            for key, _ in expired:
+                del self._seen[key]
+
+        for (level, message), count in expired:
+            logger.bind(repeat_summary=True).log(level, f'{message} (repeated {count} times)')
+
+    def _run(self):
+        """ Flush the expired repetition counts until the filter is stopped. """
+
+        while not self._stopped.wait(max(self.window, 0.1)):
+            self.flush()
+
+    def stop(self):
+        """ Stop the flusher thread and log all pending repetition counts. """
+        self._stopped.set()
+        self._flusher.join()
+        self.flush(force=True)
+
+
+# ---------------------------------------------------------
+#
+def _add_request_context(record: dict):
+    """ Add the current HTTP request identity and method to the loguru record.
+
+    Values that are bound explicitly are kept.
+
+    :param record: Loguru record.
+    """
+    extra = record['extra']
+
+    if extra.get('request_id') is None:
+        extra['request_id'] = REQUEST_ID.get()
+
+    if extra.get('method') is None:
+        extra['method'] = REQUEST_METHOD.get()
+
+
+# ---------------------------------------------------------
+#
+def stop_repeat_filter():
+    """ Stop the current repeat filter, and log its pending repetition counts. """
+    global _repeat_filter
+
+    if _repeat_filter is not None:
+        _repeat_filter.stop()
+        _repeat_filter = None
+
+
 # ---------------------------------------------------------
 #
 def create_unified_logger() -> logger:
     """ Return unified Loguru logger object.
 
+    In production mode the records are written as JSON by a batched
+    writer thread, and the python logging records are moved to loguru
+    without walking the Python frames.
+
+    Repeated identical messages are collapsed, and the uvicorn access
+    log records are sampled, when that is enabled in the configuration.
+    The current request_id and method are added to every record.
+
     :return: unified Loguru logger object.
     """
+    global _repeat_filter
 
     level = config.log_level
 
-    # Remove all existing loggers.
+    # Log the pending repetition counts, and remove all existing loggers.
+    stop_repeat_filter()
     logger.remove()
+    logger.configure(patcher=_add_request_context)
+    repeat_filter = (RepeatFilter(config.log_repeat_window)
+                     if config.log_repeat_window > 0 else None)
+    _repeat_filter = repeat_filter
 
-    # Create a basic Loguru logging config.
-    logger.add(
-        enqueue=True,
-        colorize=True,
-        backtrace=True,
-        sink=sys.stderr,
-        level=level.upper(),
-        format=config.log_format,
-        diagnose=config.log_diagnose,
-    )
+    if config.log_production:
+        logger.add(
+            format='{message}',
+            filter=repeat_filter,
+            level=level.upper(),
+            sink=BatchedJsonSink(sys.stderr, max_size=config.log_queue_size,
+                                 batch_size=config.log_batch_size),
+        )
+
+    else:
+        # Create a basic Loguru logging config.
+        logger.add(
+            enqueue=True,
+            colorize=True,
+            backtrace=True,
+            sink=sys.stderr,
+            level=level.upper(),
+            filter=repeat_filter,
+            format=config.log_format,
+            diagnose=config.log_diagnose,
+        )
 
     # Prepare to incorporate python standard logging.
     seen = set()
-    logging.basicConfig(handlers=[InterceptHandler()], level=0)
+    handler = InterceptHandler(fast=config.log_production)
+    logging.basicConfig(handlers=[handler], level=0)
 
     for logger_name in logging.root.manager.loggerDict.keys():
 
         if logger_name not in seen:
             seen.add(logger_name)
             mod_logger = logging.getLogger(logger_name)
-            mod_logger.handlers = [InterceptHandler()]
+            mod_logger.handlers = [handler]
             mod_logger.propagate = False
 
+    access_logger = logging.getLogger('uvicorn.access')
+
+    for item in [item for item in access_logger.filters
+                 if isinstance(item, AccessLogSampler)]:
+        access_logger.removeFilter(item)
+
+    if config.log_access_sample_rate < 1.0:
+        access_logger.addFilter(AccessLogSampler(rate=config.log_access_sample_rate,
+                                                 slow_after=config.log_slow_request))
+
     return logger.bind(request_id=None, method=None)
@@ -10,13 +10,64 @@ VERSION INFO::
      $Rev: 9
 """
 
+# BUILTIN modules
+from typing import List, NamedTuple
+
 # Third party modules
+from pymongo import IndexModel, ASCENDING
+from pymongo.errors import CollectionInvalid, OperationFailure
+from pymongo.collation import Collation, CollationStrength
 from motor.motor_asyncio import (AsyncIOMotorClient,
                                  AsyncIOMotorDatabase,
+                                 AsyncIOMotorCollection,
                                  AsyncIOMotorClientSession)
 
 # Local program modules
+from .metrics import CommandMonitor
 from .config.setup import config
+from .fake_motor import FakeMotorClient
+from .pool_monitor import PoolMonitor
+
+# Constants
+NAME_COLLATION = Collation(locale='en', strength=CollationStrength.SECONDARY)
+""" Case-insensitive collation used for Item name lookups. """
+POOL_MONITOR = PoolMonitor()
+""" Connection pool telemetry for the worker process. """
+COMMAND_MONITOR = CommandMonitor()
+""" MongoDB command latency recorder. """
+NAMESPACE_NOT_FOUND = 26
+""" MongoDB error code when a collection does not exist. """
+ITEM_INDEXES = (
+    IndexModel([('name', ASCENDING), ('_id', ASCENDING)], name='name_ci',
+               collation=NAME_COLLATION, background=config.mongo_index_background),
+    IndexModel([('price', ASCENDING), ('_id', ASCENDING)], name='price',
+               background=config.mongo_index_background),
+    IndexModel([('count', ASCENDING), ('_id', ASCENDING)], name='count',
+               background=config.mongo_index_background),
+    IndexModel([('category', ASCENDING), ('_id', ASCENDING)], name='category',
+               background=config.mongo_index_background),
+    IndexModel([('category', ASCENDING), ('price', ASCENDING), ('_id', ASCENDING)],
+               name='category_price', background=config.mongo_index_background),
+)
+""" Declared indexes for the api_db.items collection.
+
+Note that every index has _id as a suffix, so that an equality match
+on the indexed fields can return a page in _id order without sorting.
+The category index is needed for that too, since category_price only
+returns the Items of a category in _id order per price.
+"""
+
+
+# ---------------------------------------------------------
+#
+class IndexReport(NamedTuple):
+    """ Result of an index reconciliation.
+
+    :ivar created: Names of created indexes.
+    :ivar dropped: Names of dropped indexes.
+    """
+    created: List[str]
+    dropped: List[str]
 
 
 # ---------------------------------------------------------
@@ -29,17 +80,142 @@ class Engine:
     :ivar db: AsyncIOMotorDatabase class instance.
     :type client: C{motor.motor_asyncio.AsyncIOMotorClient}
     :ivar client: AsyncIOMotorClient class instance.
+    :type items: C{motor.motor_asyncio.AsyncIOMotorCollection}
+    :ivar items: Shared api_db.items collection instance.
     """
     db: AsyncIOMotorDatabase = None
     client: AsyncIOMotorClient = None
+    items: AsyncIOMotorCollection = None
 
     # ---------------------------------------------------------
     #
     @classmethod
     async def connect_to_mongo(cls):
-        """ Initialize DB connection to MongoDb and database. """
-        cls.client = AsyncIOMotorClient(config.mongo_url)
+        """ Initialize DB connection to MongoDb and database.
+
+        The connection pool is sized from the configuration, and its
+        telemetry is available from POOL_MONITOR. The command latencies
+        are recorded by COMMAND_MONITOR.
+
+        When the mongo_fake config parameter is set, an in-process fake
+        client is used instead (there is no pool or command telemetry).
+        """
+        if config.mongo_fake:
+            cls.client = FakeMotorClient(latency=config.mongo_fake_latency)
+
+        else:
+            cls.client = AsyncIOMotorClient(
+                config.mongo_url,
+                maxPoolSize=config.mongo_max_pool_size,
+                minPoolSize=config.mongo_min_pool_size,
+                waitQueueTimeoutMS=config.mongo_wait_queue_timeout_ms,
+                maxIdleTimeMS=config.mongo_max_idle_time_ms,
+                compressors=config.mongo_compressors,
+                serverSelectionTimeoutMS=config.mongo_server_selection_timeout_ms,
+                event_listeners=[POOL_MONITOR, COMMAND_MONITOR])
+
         cls.db = cls.client.api_db
+        cls.items = cls.db.items
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _index_differs(declared: dict, existing: dict) -> bool:
+        """ Check if an existing index differs from its declaration.
+
+        Only the key and the collation locale and strength are compared,
+        since MongoDB adds default values for the other collation fields.
+
+        :param declared: Declared index document.
+        :param existing: Existing index information.
+        :return: Difference status.
+        """
+        declared_collation = declared.get('collation', {})
+        existing_collation = existing.get('collation', {})
+
+        return any(
+            (
+                list(declared['key'].items()) != list(existing['key']),
+                declared_collation.get('locale') != existing_collation.get('locale'),
+                declared_collation.get('strength') != existing_collation.get('strength'),
+            )
+        )
+
+    # ---------------------------------------------------------
+    #
+    @classmethod
+    async def reconcile_indexes(cls) -> IndexReport:
+        """ Make the api_db.items indexes match the ITEM_INDEXES declaration.
+
+        Missing indexes are created and indexes that differ from their
+        declaration are re-created. Indexes that are not declared are
+        dropped when the mongo_index_prune config parameter is set.
+        This is idempotent, so nothing happens when the indexes already
+        match the declaration.
+
+        :return: Names of created and dropped indexes.
+        """
+        report = IndexReport(created=[], dropped=[])
+        existing = await cls.db.items.index_information()
+        declared = {index.document['name']: index for index in ITEM_INDEXES}
+
+        for name, info in existing.items():
+
+            if name == '_id_':
+                continue
+
+            elif name in declared:
+                if cls._index_differs(declared[name].document, info):
+                    await cls.db.items.drop_index(name)
+                    report.dropped.append(name)
+
+            elif config.mongo_index_prune:
+                await cls.db.items.drop_index(name)
+                report.dropped.append(name)
+
+        missing = [index for name, index in declared.items()
+                   if name not in existing or name in report.dropped]
+
+        if missing:
+            report.created.extend(await cls.db.items.create_indexes(missing))
+
+        return report
+
+    # ---------------------------------------------------------
+    #
+    @classmethod
+    async def apply_validator(cls, schema: dict) -> bool:
+        """ Install a $jsonSchema validator on the api_db.items collection.
+
+        The collection is created when it does not exist. It can also be
+        created meanwhile by a concurrent write or index build (like the
+        background index reconciliation), and then it's modified instead.
+        The validator only applies to writes, so the existing documents
+        are checked against it afterwards.
+
+        :param schema: MongoDB $jsonSchema.
+        :return: True when all existing documents match the schema.
+        """
+        validator = {'$jsonSchema': schema}
+        options = {'validator': validator, 'validationLevel': 'strict',
+                   'validationAction': 'error'}
+
+        try:
+            await cls.db.command('collMod', 'items', **options)
+
+        except OperationFailure as why:
+            if why.code != NAMESPACE_NOT_FOUND:
+                raise
+
+            try:
+                await cls.db.create_collection('items', **options)
+
+            except CollectionInvalid:
+                await cls.db.command('collMod', 'items', **options)
+
+        mismatch = await cls.db.items.find_one({'$nor': [validator]},
+                                               projection={'_id': 1})
+        return mismatch is None
 
     # ---------------------------------------------------------
     #
@@ -55,13 +231,30 @@ class Engine:
         """ Return MongoDB connection status. """
         return bool(await cls.client.server_info())
 
+    # ---------------------------------------------------------
+    #
+    @classmethod
+    async def get_items_collection(cls) -> AsyncIOMotorCollection:
+        """ Return the shared api_db.items collection handle.
+
+        The handle is safe to share between requests, since the client
+        connection pool is used for every operation. This is a coroutine,
+        so that FastAPI does not run the dependency in the threadpool.
+
+        Returns:
+            The api_db.items collection.
+        """
+        return cls.items
+
     # ---------------------------------------------------------
     #
     @classmethod
     async def get_async_session(cls) -> AsyncIOMotorClientSession:
         """ Return an active database session object from the pool.
 
-        Note that this is a DB session generator.
+        Note that this is a DB session generator. It's only needed for
+        operations that run in a transaction or that need causal
+        consistency, other operations use an implicit session.
 
         Returns:
             An active DB session.
@@ -0,0 +1,852 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import asyncio
+import operator
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Tuple, Union, Optional
+
+# Third party modules
+from bson import ObjectId
+from pymongo import IndexModel, ReturnDocument
+from pymongo.collation import Collation
+from pymongo.errors import (BulkWriteError, CollectionInvalid,
+                            DuplicateKeyError, OperationFailure)
+from pymongo.results import (DeleteResult, InsertManyResult,
+                             InsertOneResult, UpdateResult)
+
+# Constants
+DUPLICATE_KEY = 11000
+""" MongoDB error code for a duplicate key. """
+NAMESPACE_NOT_FOUND = 26
+""" MongoDB error code when a collection does not exist. """
+COMPARISONS = {'$eq': operator.eq, '$ne': operator.ne,
+               '$gt': operator.gt, '$gte': operator.ge,
+               '$lt': operator.lt, '$lte': operator.le,
+               '$in': lambda value, operand: value in operand}
+""" Supported query comparison operators. """
+
+
+# ---------------------------------------------------------
+#
+def _fold(value: Any, collation: Optional[Collation]) -> Any:
+    """ Return the value as it's compared with the collation.
+
+    Only the case-insensitive strengths (1 and 2) change the comparison.
+
+    :param value: Document or query value.
+    :param collation: Possible query collation.
+    :return: Comparable value.
+    """
+    if (collation is not None and isinstance(value, str)
+            and collation.document.get('strength', 3) <= 2):
+        return value.casefold()
+
+    return value
+
+
+# ---------------------------------------------------------
+#
+def _compare(value: Any, condition: Any, collation: Optional[Collation]) -> bool:
+    """ Check if a document value satisfies a query condition.
+
+    :param value: Document value, None when it's missing.
+    :param condition: Query value, or a document of comparison operators.
+    :param collation: Possible query collation.
+    :return: Match status.
+    """
+    if not (isinstance(condition, dict) and condition
+            and all(key.startswith('$') for key in condition)):
+        return _fold(value, collation) == _fold(condition, collation)
+
+    for name, operand in condition.items():
+        if name not in COMPARISONS:
+            raise NotImplementedError(f'Query operator {name} is not supported')
+
+        if value is None and name not in ('$eq', '$ne'):
+            return False
+
+        if name == '$in':
+            operand = [_fold(item, collation) for item in operand]
+
+        else:
+            operand = _fold(operand, collation)
+
+        if not COMPARISONS[name](_fold(value, collation), operand):
+            return False
+
+    return True
+
+
+# ---------------------------------------------------------
+#
+def _matches(document: dict, query: Optional[dict],
+             collation: Optional[Collation] = None) -> bool:
+    """ Check if a document matches a query filter.
+
+    Field equality, the COMPARISONS operators, $and, $or and $nor are
+    supported. A $jsonSchema matches every document, since the fake
+    does not enforce validators.
+
+    :param document: Stored document.
+    :param query: Possible query filter.
+    :param collation: Possible query collation.
+    :return: Match status.
+    """
+    for key, condition in (query or {}).items():
+        if key == '$and':
+            matched = all(_matches(document, item, collation) for item in condition)
+
+        elif key == '$or':
+            matched = any(_matches(document, item, collation) for item in condition)
+
+        elif key == '$nor':
+            matched = not any(_matches(document, item, collation) for item in condition)
+
+        elif key == '$jsonSchema':
+            matched = True
+
+        elif key.startswith('$'):
+            raise NotImplementedError(f'Query operator {key} is not supported')
+
+        else:
+            matched = _compare(document.get(key), condition, collation)
+
+        if not matched:
+            return False
+
+    return True
+
+
+# ---------------------------------------------------------
+#
+def _project(document: dict, projection: Optional[dict]) -> dict:
+    """ Return a copy of the document with the projected fields.
+
+    :param document: Stored document.
+    :param projection: Possible inclusion or exclusion projection.
+    :return: Document copy.
+    """
+    if not projection:
+        return dict(document)
+
+    included = {key for key, value in projection.items() if value and key != '_id'}
+
+    if not included:
+        return {key: value for key, value in document.items()
+                if projection.get(key, 1)}
+
+    if projection.get('_id', 1):
+        included.add('_id')
+
+    return {key: value for key, value in document.items() if key in included}
+
+
+# -----------------------------------------------------------------------------
+#
+class FakeClientSession:
+    """ Stand-in for AsyncIOMotorClientSession, without transactions.
+
+    :ivar client: Owning client.
+    :ivar options: Session options, like snapshot.
+    :ivar has_ended: Session status.
+    """
+
+    def __init__(self, client: 'FakeMotorClient', **options):
+        """ Implicit constructor.
+
+        :param client: Owning client.
+        :param options: Session options.
+        """
+        self.client = client
+        self.options = options
+        self.has_ended = False
+
+    async def end_session(self):
+        """ End the session. """
+        self.has_ended = True
+
+    async def __aenter__(self) -> 'FakeClientSession':
+        """ Return the session. """
+        return self
+
+    async def __aexit__(self, *args):
+        """ End the session. """
+        await self.end_session()
+
+
+# -----------------------------------------------------------------------------
+#
+class FakeCursor:
+    """ Stand-in for AsyncIOMotorCursor.
+
+    The result is selected when the iteration starts. It's returned in
+    batches of batch_size documents, with one round trip per batch (all
+    documents in one round trip when batch_size is 0).
+
+    :ivar collection: Queried collection.
+    """
+
+    def __init__(self, collection: 'FakeCollection', query: Optional[dict],
+                 projection: Optional[dict], collation: Optional[Collation],
+                 batch_size: int):
+        """ Implicit constructor.
+
+        :param collection: Queried collection.
+        :param query: Possible query filter.
+        :param projection: Possible projection.
+        :param collation: Possible query collation.
+        :param batch_size: Number of documents per round trip.
+        """
+        self.collection = collection
+        self._query = query
+        self._projection = projection
+        self._collation = collation
+        self._batch_size = batch_size
+        self._sort: List[Tuple[str, int]] = []
+        self._limit = 0
+        self._skip = 0
+        self._result: Optional[Deque[dict]] = None
+        self._batch: Deque[dict] = deque()
+
+    # ---------------------------------------------------------
+    #
+    def sort(self, key: Union[str, List[Tuple[str, int]]],
+             direction: int = 1) -> 'FakeCursor':
+        """ Set the sort order.
+
+        :param key: Field name, or a list of (field, direction) pairs.
+        :param direction: Sort direction for a single field.
+        :return: The cursor.
+        """
+        self._sort = [(key, direction)] if isinstance(key, str) else list(key)
+        return self
+
+    # ---------------------------------------------------------
+    #
+    def limit(self, limit: int) -> 'FakeCursor':
+        """ Set the maximum number of documents (0 is no limit).
+
+        :param limit: Maximum number of documents.
+        :return: The cursor.
+        """
+        self._limit = limit
+        return self
+
+    # ---------------------------------------------------------
+    #
+    def skip(self, skip: int) -> 'FakeCursor':
+        """ Set the number of skipped documents.
+
+        :param skip: Number of skipped documents.
+        :return: The cursor.
+        """
+        self._skip = skip
+        return self
+
+    # ---------------------------------------------------------
+    #
+    def _select(self) -> List[dict]:
+        """ Return the matching documents, sorted, limited and projected. """
+        documents = [document for document in self.collection.documents.values()
+                     if _matches(document, self._query, self._collation)]
+
+        # Sort on the least significant key first, since the sort is stable.
+        for key, direction in reversed(self._sort):
+            documents.sort(key=lambda item: _fold(item.get(key), self._collation),
+                           reverse=direction < 0)
+
+        end = self._skip + self._limit if self._limit else None
+        return [_project(item, self._projection) for item in documents[self._skip:end]]
+
+    # ---------------------------------------------------------
+    #
+    def __aiter__(self) -> 'FakeCursor':
+        """ Return the cursor. """
+        return self
+
+    # ---------------------------------------------------------
+    #
+    async def __anext__(self) -> dict:
+        """ Return the next document, fetching a batch when needed. """
+        if not self._batch:
+            if self._result is None:
+                await self.collection.database.client.round_trip('find')
+                self._result = deque(self._select())
+
+            elif self._result:
+                await self.collection.database.client.round_trip('getMore')
+
+            size = min(self._batch_size or len(self._result), len(self._result))
+            self._batch = deque(self._result.popleft() for _ in range(size))
+
+        if not self._batch:
+            raise StopAsyncIteration
+
+        return self._batch.popleft()
+
+    # ---------------------------------------------------------
+    #
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        """ Return up to length documents (all when length is None).
+
+        :param length: Maximum number of documents.
+        :return: Documents.
+        """
+        result = []
+
+        async for document in self:
+            result.append(document)
+
+            if length is not None and len(result) == length:
+                break
+
+        return result
+
+
+# -----------------------------------------------------------------------------
+#
+class FakeChangeStream:
+    """ Stand-in for AsyncIOMotorChangeStream.
+
+    Only the changes made after the stream is opened are returned, since
+    the fake keeps no history. A resume token is accepted but not used.
+
+    :ivar alive: Stream status.
+    :ivar resume_token: Position of the latest returned event.
+    """
+
+    def __init__(self, collection: 'FakeCollection', max_await_time_ms: Optional[int]):
+        """ Implicit constructor.
+
+        :param collection: Watched collection.
+        :param max_await_time_ms: Time try_next() waits for an event.
+        """
+        self.alive = True
+        self.resume_token = None
+        self._collection = collection
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._timeout = (max_await_time_ms or 1000) / 1000
+
+    # ---------------------------------------------------------
+    #
+    def publish(self, event: dict):
+        """ Add a change event to the stream.
+
+        :param event: Change event.
+        """
+        self._events.put_nowait(event)
+
+    # ---------------------------------------------------------
+    #
+    async def try_next(self) -> Optional[dict]:
+        """ Return the next change event, or None when there is none in time.
+
+        :return: Possible change event.
+        """
+        try:
+            event = await asyncio.wait_for(self._events.get(), self._timeout)
+
+        except asyncio.TimeoutError:
+            return None
+
+        self.resume_token = event['_id']
+        return event
+
+    # ---------------------------------------------------------
+    #
+    async def close(self):
+        """ Close the stream. """
+        self.alive = False
+        self._collection.streams.discard(self)
+
+    async def __aenter__(self) -> 'FakeChangeStream':
+        """ Return the stream. """
+        return self
+
+    async def __aexit__(self, *args):
+        """ Close the stream. """
+        await self.close()
+
+
+# -----------------------------------------------------------------------------
+#
+class FakeCollection:
+    """ Stand-in for AsyncIOMotorCollection.
+
+    Every operation accepts, and ignores, the session and comment
+    options. Every awaited operation is one round trip on the client.
+
+    :ivar name: Collection name.
+    :ivar database: Owning database.
+    :ivar documents: Stored documents, per _id value, in insert order.
+    :ivar indexes: Index information, per index name.
+    :ivar options: Collection options, like the validator.
+    :ivar streams: Open change streams.
+    :ivar created: The collection exists (it has been written to or created).
+    """
+
+    def __init__(self, database: 'FakeDatabase', name: str):
+        """ Implicit constructor.
+
+        :param database: Owning database.
+        :param name: Collection name.
+        """
+        self.name = name
+        self.database = database
+        self.documents: Dict[Any, dict] = {}
+        self.indexes = {'_id_': {'v': 2, 'key': [('_id', 1)]}}
+        self.options: dict = {}
+        self.streams = set()
+        self.created = False
+        self._sequence = 0
+
+    # ---------------------------------------------------------
+    #
+    async def _round_trip(self, command: str):
+        """ Count the command and wait the injected latency.
+
+        :param command: MongoDB command name.
+        """
+        await self.database.client.round_trip(command)
+
+    # ---------------------------------------------------------
+    #
+    def _notify(self, operation: str, key: Any):
+        """ Publish a change event to the open change streams.
+
+        :param operation: Change operation type.
+        :param key: Changed document _id value.
+        """
+        self._sequence += 1
+        event = {'_id': {'_data': f'{self._sequence:016x}'}, 'operationType': operation,
+                 'ns': {'db': self.database.name, 'coll': self.name},
+                 'documentKey': {'_id': key}}
+
+        for stream in self.streams:
+            stream.publish(event)
+
+    # ---------------------------------------------------------
+    #
+    def _insert(self, document: dict) -> Any:
+        """ Store a copy of the document, and return its _id value.
+
+        :param document: New document, an _id is added when it's missing.
+        :return: Document _id value.
+        :except DuplicateKeyError: The _id value is already stored.
+        """
+        document.setdefault('_id', ObjectId())
+        key = document['_id']
+
+        if key in self.documents:
+            raise DuplicateKeyError(f'E11000 duplicate key error collection: '
+                                    f'{self.database.name}.{self.name} '
+                                    f'dup key: {{ _id: {key!r} }}', DUPLICATE_KEY)
+
+        self.created = True
+        self.documents[key] = dict(document)
+        self._notify('insert', key)
+        return key
+
+    # ---------------------------------------------------------
+    #
+    def _find(self, query: dict, collation: Optional[Collation] = None) -> Optional[dict]:
+        """ Return the first stored document that matches the query.
+
+        :param query: Query filter.
+        :param collation: Possible query collation.
+        :return: Stored document, or None when it's not found.
+        """
+        if set(query) == {'_id'} and not isinstance(query['_id'], dict):
+            return self.documents.get(query['_id'])
+
+        return next((document for document in self.documents.values()
+                     if _matches(document, query, collation)), None)
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def _update(document: dict, update: dict):
+        """ Apply the update operators to the stored document.
+
+        :param document: Stored document.
+        :param update: Update document, with $set, $unset or $inc.
+        """
+        for name, fields in update.items():
+            if name == '$set':
+                document.update(fields)
+
+            elif name == '$unset':
+                for key in fields:
+                    document.pop(key, None)
+
+            elif name == '$inc':
+                for key, value in fields.items():
+                    document[key] = document.get(key, 0) + value
+
+            else:
+                raise NotImplementedError(f'Update operator {name} is not supported')
+
+    # ---------------------------------------------------------
+    #
+    async def insert_one(self, document: dict, **_) -> InsertOneResult:
+        """ Insert a document.
+
+        :param document: New document.
+        :return: Insert result.
+        """
+        await self._round_trip('insert')
+        return InsertOneResult(self._insert(document), acknowledged=True)
+
+    # ---------------------------------------------------------
+    #
+    async def insert_many(self, documents: List[dict], ordered: bool = True,
+                          **_) -> InsertManyResult:
+        """ Insert documents, a failed document stops an ordered insert.
+
+        :param documents: New documents.
+        :param ordered: Stop at the first failed document.
+        :return: Insert result.
+        :except BulkWriteError: Some documents were not inserted.
+        """
+        await self._round_trip('insert')
+        ids, errors = [], []
+
+        for index, document in enumerate(documents):
+            try:
+                ids.append(self._insert(document))
+
+            except DuplicateKeyError as why:
+                errors.append({'index': index, 'code': why.code, 'errmsg': str(why)})
+
+                if ordered:
+                    break
+
+        if errors:
+            raise BulkWriteError({'writeErrors': errors, 'writeConcernErrors': [],
+                                  'nInserted': len(ids), 'nUpserted': 0, 'nMatched': 0,
+                                  'nModified': 0, 'nRemoved': 0, 'upserted': []})
+
+        return InsertManyResult(ids, acknowledged=True)
+
+    # ---------------------------------------------------------
+    #
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None,
+             collation: Optional[Collation] = None, batch_size: int = 0,
+             **_) -> FakeCursor:
+        """ Return a cursor for the matching documents.
+
+        :param query: Possible query filter.
+        :param projection: Possible projection.
+        :param collation: Possible query collation.
+        :param batch_size: Number of documents per round trip.
+        :return: Cursor.
+        """
+        return FakeCursor(self, query, projection, collation, batch_size)
+
+    # ---------------------------------------------------------
+    #
+    async def find_one(self, query: Optional[dict] = None,
+                       projection: Optional[dict] = None,
+                       collation: Optional[Collation] = None, **_) -> Optional[dict]:
+        """ Return the first matching document.
+
+        :param query: Possible query filter.
+        :param projection: Possible projection.
+        :param collation: Possible query collation.
+        :return: Document copy, or None when it's not found.
+        """
+        await self._round_trip('find')
+        document = self._find(query or {}, collation)
+        return None if document is None else _project(document, projection)
+
+    # ---------------------------------------------------------
+    #
+    async def find_one_and_update(self, query: dict, update: dict,
+                                  projection: Optional[dict] = None,
+                                  return_document: bool = ReturnDocument.BEFORE,
+                                  collation: Optional[Collation] = None,
+                                  **_) -> Optional[dict]:
+        """ Update the first matching document and return it.
+
+        :param query: Query filter.
+        :param update: Update document.
+        :param projection: Possible projection.
+        :param return_document: Return the document before or after the update.
+        :param collation: Possible query collation.
+        :return: Document copy, or None when it's not found.
+        """
+        await self._round_trip('findAndModify')
+        document = self._find(query, collation)
+
+        if document is None:
+            return None
+
+        before = _project(document, projection)
+        self._update(document, update)
+        self._notify('update', document['_id'])
+        return _project(document, projection) if return_document else before
+
+    # ---------------------------------------------------------
+    #
+    async def update_one(self, query: dict, update: dict,
+                         collation: Optional[Collation] = None, **_) -> UpdateResult:
+        """ Update the first matching document.
+
+        :param query: Query filter.
+        :param update: Update document.
+        :param collation: Possible query collation.
+        :return: Update result.
+        """
+        await self._round_trip('update')
+        document = self._find(query, collation)
+
+        if document is None:
+            return UpdateResult({'n': 0, 'nModified': 0, 'updatedExisting': False},
+                                acknowledged=True)
+
+        before = dict(document)
+        self._update(document, update)
+        self._notify('update', document['_id'])
+        return UpdateResult({'n': 1, 'nModified': int(before != document),
+                             'updatedExisting': True}, acknowledged=True)
+
+    # ---------------------------------------------------------
+    #
+    async def delete_one(self, query: dict, collation: Optional[Collation] = None,
+                         **_) -> DeleteResult:
+        """ Delete the first matching document.
+
+        :param query: Query filter.
+        :param collation: Possible query collation.
+        :return: Delete result.
+        """
+        await self._round_trip('delete')
+        document = self._find(query, collation)
+
+        if document is None:
+            return DeleteResult({'n': 0}, acknowledged=True)
+
+        del self.documents[document['_id']]
+        self._notify('delete', document['_id'])
+        return DeleteResult({'n': 1}, acknowledged=True)
+
+    # ---------------------------------------------------------
+    #
+    async def index_information(self, **_) -> Dict[str, dict]:
+        """ Return the index information, per index name. """
+        await self._round_trip('listIndexes')
+        return {name: dict(info) for name, info in self.indexes.items()}
+
+    # ---------------------------------------------------------
+    #
+    async def create_indexes(self, indexes: List[IndexModel], **_) -> List[str]:
+        """ Record the indexes, they are not used by the queries.
+
+        :param indexes: Index declarations.
+        :return: Index names.
+        """
+        await self._round_trip('createIndexes')
+        self.created = True
+
+        for index in indexes:
+            document = index.document
+            info = {'v': 2, 'key': list(document['key'].items())}
+
+            if 'collation' in document:
+                info['collation'] = dict(document['collation'])
+
+            self.indexes[document['name']] = info
+
+        return [index.document['name'] for index in indexes]
+
+    # ---------------------------------------------------------
+    #
+    async def drop_index(self, name: str, **_):
+        """ Drop an index.
+
+        :param name: Index name.
+        :except OperationFailure: The index does not exist.
+        """
+        await self._round_trip('dropIndexes')
+
+        if self.indexes.pop(name, None) is None:
+            raise OperationFailure(f'index not found with name [{name}]', 27)
+
+    # ---------------------------------------------------------
+    #
+    def watch(self, max_await_time_ms: Optional[int] = None, **_) -> FakeChangeStream:
+        """ Return a change stream for the later changes in the collection.
+
+        :param max_await_time_ms: Time try_next() waits for an event.
+        :return: Change stream.
+        """
+        stream = FakeChangeStream(self, max_await_time_ms)
+        self.streams.add(stream)
+        return stream
+
+
+# -----------------------------------------------------------------------------
+#
+class FakeDatabase:
+    """ Stand-in for AsyncIOMotorDatabase.
+
+    :ivar client: Owning client.
+    :ivar name: Database name.
+    """
+
+    def __init__(self, client: 'FakeMotorClient', name: str):
+        """ Implicit constructor.
+
+        :param client: Owning client.
+        :param name: Database name.
+        """
+        self.name = name
+        self.client = client
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        """ Return the collection, it's created on first use. """
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        """ Return the collection, it's created on first use. """
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return self[name]
+
+    # ---------------------------------------------------------
+    #
+    async def create_collection(self, name: str, **options) -> FakeCollection:
+        """ Create a collection with options, like a validator.
+
+        :param name: Collection name.
+        :param options: Collection options.
+        :return: Created collection.
+        :except CollectionInvalid: The collection already exists.
+        """
+        await self.client.round_trip('create')
+        collection = self[name]
+
+        if collection.created:
+            raise CollectionInvalid(f'collection {name} already exists')
+
+        collection.created = True
+        collection.options = options
+        return collection
+
+    # ---------------------------------------------------------
+    #
+    async def command(self, command: str, value: Any = 1, **options) -> dict:
+        """ Run a database command, only ping and collMod are supported.
+
+        :param command: Command name.
+        :param value: Command value, the collection name for collMod.
+        :param options: Command options.
+        :return: Command response.
+        :except OperationFailure: The collMod collection does not exist.
+        """
+        await self.client.round_trip(command)
+
+        if command == 'collMod':
+            collection = self[value]
+
+            if not collection.created:
+                raise OperationFailure(f'ns does not exist: {self.name}.{value}',
+                                       NAMESPACE_NOT_FOUND)
+
+            collection.options.update(options)
+
+        elif command != 'ping':
+            raise NotImplementedError(f'Command {command} is not supported')
+
+        return {'ok': 1.0}
+
+
+# -----------------------------------------------------------------------------
+#
+class FakeMotorClient:
+    """ In-process stand-in for the AsyncIOMotorClient subset that is used.
+
+    This is used for benchmarks and tests without a MongoDB server. The
+    documents are kept in memory, and the queries scan the collection
+    (the indexes are only recorded). Validators are not enforced, and
+    sessions have no transactions.
+
+    Every round trip is counted per command name, and waits the injected
+    latency, so that the DB time of a real deployment can be simulated.
+
+    :ivar latency: Number of seconds added to every round trip.
+    :ivar operations: Number of round trips, per command name.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """ Implicit constructor.
+
+        :param latency: Number of seconds added to every round trip.
+        """
+        self.latency = latency
+        self.operations = Counter()
+        self._databases: Dict[str, FakeDatabase] = {}
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        """ Return the database, it's created on first use. """
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(self, name)
+
+        return self._databases[name]
+
+    def __getattr__(self, name: str) -> FakeDatabase:
+        """ Return the database, it's created on first use. """
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        return self[name]
+
+    # ---------------------------------------------------------
+    #
+    async def round_trip(self, command: str):
+        """ Count the command and wait the injected latency.
+
+        :param command: MongoDB command name.
+        """
+        self.operations[command] += 1
+
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+    # ---------------------------------------------------------
+    #
+    async def start_session(self, **options) -> FakeClientSession:
+        """ Return a new session.
+
+        :param options: Session options, like snapshot.
+        :return: Session.
+        """
+        return FakeClientSession(self, **options)
+
+    # ---------------------------------------------------------
+    #
+    async def server_info(self) -> dict:
+        """ Return the server version information. """
+        await self.round_trip('buildInfo')
+        return {'version': '7.0.0', 'versionArray': [7, 0, 0, 0], 'ok': 1.0}
+
+    # ---------------------------------------------------------
+    #
+    def close(self):
+        """ Close the client, the stored data is kept. """
@@ -11,7 +11,10 @@ VERSION INFO::
 """
 
 # BUILTIN modules
-from typing import List
+import time
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, Optional, Callable, Awaitable, NamedTuple
 
 # Third party modules
 from loguru import logger
@@ -22,40 +25,152 @@ from .config.setup import config
 from .schemas import HealthResourceModel, HealthResponseModel
 
 
+# ---------------------------------------------------------
+#
+class HealthProbe(NamedTuple):
+    """ Registered resource probe.
+
+    :ivar name: Resource name.
+    :ivar check: Coroutine function that returns the resource status.
+    :ivar timeout: Number of seconds before the resource is reported as down.
+    """
+    name: str
+    check: Callable[[], Awaitable[bool]]
+    timeout: float
+
+
 # -----------------------------------------------------------------------------
 #
 class HealthManager:
-    """ This class handles health status reporting on used resources. """
+    """ This class handles health status reporting on used resources.
+
+    The resources are probed by a background task, and the health
+    endpoints return the cached result. That way the endpoints don't
+    generate DB round trips, and they stay fast when a resource is slow.
+
+    All registered probes run concurrently, each one with its own
+    timeout, so a probe takes at most as long as the slowest timeout.
+
+    :ivar status: Latest probed health status.
+    :ivar updated: Monotonic time of the latest probe.
+    :ivar probes: Registered resource probes.
+    """
+
+    def __init__(self):
+        """ Implicit constructor. """
+        self.updated = 0.0
+        self._last_success = {}
+        self.probes: Dict[str, HealthProbe] = {}
+        self.status: Optional[HealthResponseModel] = None
 
     # ---------------------------------------------------------
     #
-    @staticmethod
-    async def _get_mongo_status() -> List[HealthResourceModel]:
-        """ Return MongoDb connection status.
+    def register(self, name: str, check: Callable[[], Awaitable[bool]],
+                 timeout: Optional[float] = None):
+        """ Add a resource probe.
 
-        :return: MongoDb connection status.
+        :param name: Resource name.
+        :param check: Coroutine function that returns the resource status.
+        :param timeout: Probe timeout (default is the health_probe_timeout config parameter).
         """
+        self.probes[name] = HealthProbe(name=name, check=check,
+                                        timeout=timeout or config.health_probe_timeout)
+
+    # ---------------------------------------------------------
+    #
+    async def _run_probe(self, probe: HealthProbe) -> HealthResourceModel:
+        """ Return the resource status, measured by the probe.
+
+        :param probe: Resource probe.
+        :return: Resource status.
+        """
+        start = time.perf_counter()
+
         try:
-            status = await Engine.is_db_connected()
+            status = bool(await asyncio.wait_for(probe.check(), probe.timeout))
+
+        except asyncio.TimeoutError:
+            logger.critical(f'{probe.name}: no response within {probe.timeout} seconds')
+            status = False
 
-        except BaseException as why:
-            logger.critical(f'MongoDB: {why.args[0]}')
+        except Exception as why:
+            logger.critical(f'{probe.name}: {why}')
             status = False
 
-        return [HealthResourceModel(name='MongoDb', status=status)]
+        if status:
+            self._last_success[probe.name] = datetime.now(timezone.utc)
+
+        return HealthResourceModel(name=probe.name, status=status,
+                                   latency=time.perf_counter() - start,
+                                   last_success=self._last_success.get(probe.name))
 
     # ---------------------------------------------------------
     #
-    async def get_status(self) -> HealthResponseModel:
-        """ Return Health status for used resources.
+    async def probe(self) -> HealthResponseModel:
+        """ Probe the used resources concurrently and cache the result.
 
         :return: Service health status.
         """
-        resource_items = []
-        resource_items += await self._get_mongo_status()
+        resource_items = await asyncio.gather(
+            *(self._run_probe(probe) for probe in self.probes.values()))
         total_status = all(key.status for key in resource_items)
 
-        return HealthResponseModel(status=total_status,
-                                   version=config.version,
-                                   name=config.service_name,
-                                   resources=resource_items)
+        self.status = HealthResponseModel(status=total_status,
+                                          version=config.version,
+                                          name=config.service_name,
+                                          resources=resource_items)
+        self.updated = time.monotonic()
+        return self.status
+
+    # ---------------------------------------------------------
+    #
+    async def run(self):
+        """ Probe the used resources periodically until the task is cancelled. """
+
+        while True:
+            await self.probe()
+            await asyncio.sleep(config.health_probe_interval)
+
+    # ---------------------------------------------------------
+    #
+    def get_status(self) -> HealthResponseModel:
+        """ Return the cached Health status for used resources.
+
+        The resources are never probed here, so a health request doesn't
+        wait for any I/O. Until the first background probe has finished,
+        the service is reported as not ready. A cached status that is
+        older than the health_stale_after config parameter is reported
+        as unhealthy, since the probe loop is stuck.
+
+        :return: Service health status.
+        """
+        if self.status is None:
+            return HealthResponseModel(
+                status=False, version=config.version, name=config.service_name,
+                resources=[HealthResourceModel(name=name, status=False)
+                           for name in self.probes])
+
+        if time.monotonic() - self.updated > config.health_stale_after:
+            return self.status.model_copy(update={'status': False})
+
+        return self.status
+
+    # ---------------------------------------------------------
+    #
+    @staticmethod
+    def get_liveness() -> HealthResponseModel:
+        """ Return the process health status, without checking any resources.
+
+        :return: Service health status.
+        """
+        return HealthResponseModel(status=True, version=config.version,
+                                   name=config.service_name, resources=[])
+
+
+# ---------------------------------------------------------
+
+HEALTH_MANAGER = HealthManager()
+""" Worker process health status cache. """
+
+if config.item_repository == 'mongo':
+    HEALTH_MANAGER.register('MongoDb', Engine.is_db_connected)
@@ -12,18 +12,27 @@ VERSION INFO::
 
 # BUILTIN modules
 import json
+import asyncio
 from pathlib import Path
 from contextlib import asynccontextmanager
 
 # Third party modules
 from fastapi import FastAPI
+from pymongo.errors import PyMongoError
 from fastapi.staticfiles import StaticFiles
 
 # Local modules
 from .db import Engine
+from .request_id import RequestIdMiddleware
+from .metrics import MULTIPROCESS, MetricsMiddleware
+from .schemas import ItemModel
 from .config.setup import config
-from .api import item_routes, health_route
-from .custom_logging import create_unified_logger
+from .cache_watcher import CacheWatcher
+from .health_manager import HEALTH_MANAGER
+from .api.metrics_route import STATS
+from .api.dependencies import ITEM_CACHE
+from .api import item_routes, health_route, metrics_route
+from .custom_logging import create_unified_logger, stop_repeat_filter
 from .api.documentation import tags_metadata, license_info, description
 
 
@@ -35,10 +44,13 @@ class Service(FastAPI):
     The following functionality is added:
       - unified logging.
       - includes API router.
+      - records request metrics.
+      - gives every request an ID.
       - Defines a static path for images in the documentation.
 
     :ivar logger: Unified loguru logger object.
     :type logger: loguru.logger
+    :ivar tasks: Background tasks that are cancelled at shutdown.
     """
 
     def __init__(self, *args: int, **kwargs: dict):
@@ -56,10 +68,18 @@ class Service(FastAPI):
         # Add declared router information.
         self.include_router(item_routes.ROUTER)
         self.include_router(health_route.ROUTER)
+        self.include_router(metrics_route.ROUTER)
+
+        # Record the latency of every request, and give every request
+        # an ID (the last added middleware is the outermost one).
+        self.add_middleware(MetricsMiddleware)
+        self.add_middleware(RequestIdMiddleware)
 
         # Unify logging within the imported package's closure.
         self.logger = create_unified_logger()
 
+        self.tasks = []
+
 
 # ---------------------------------------------------------
 #
@@ -103,15 +123,114 @@ app.logger.trace(f'config: {json.dumps(config.model_dump(), indent=2)}')
 
 # ---------------------------------------------------------
 #
-async def startup(service: Service):
-    """ Initialize DB connection. """
+async def reconcile_indexes(service: Service):
+    """ Reconcile the DB indexes and report the outcome.
+
+    A failure is logged but not raised, since the service is still
+    usable without the indexes (only slower).
+
+    :param service: FastAPI service.
+    """
+    try:
+        report = await Engine.reconcile_indexes()
+        service.logger.info(f'MongoDB indexes created: {report.created}, '
+                            f'dropped: {report.dropped}.')
+
+    except PyMongoError as why:
+        service.logger.error(f'MongoDB index reconciliation failed: {why}.')
+
+
+# ---------------------------------------------------------
+#
+async def trust_documents(service: Service):
+    """ Install the Item $jsonSchema validator and skip validation on DB reads.
+
+    Items are only trusted when all existing documents match the
+    validator, otherwise they are still validated on every read.
+
+    :param service: FastAPI service.
+    """
+    try:
+        if await Engine.apply_validator(ItemModel.mongo_json_schema()):
+            ItemModel.trusted = True
+            service.logger.info('MongoDB Item documents are trusted.')
+
+        else:
+            service.logger.warning('MongoDB Item documents do not match the '
+                                   'validator, they are still validated.')
+
+    except PyMongoError as why:
+        service.logger.error(f'MongoDB validator installation failed: {why}.')
+
+
+# ---------------------------------------------------------
+#
+async def start_mongo(service: Service):
+    """ Initialize DB connection, reconcile the DB indexes and watch DB changes.
+
+    In background mode the index reconciliation does not delay the
+    startup, and the indexes are built using the background option.
+    When the Item cache is enabled, a change stream keeps it in sync
+    with writes made by other workers. Trusted documents are enabled
+    in the background, once the DB validator is in place.
+
+    :param service: FastAPI service.
+    """
     service.logger.info('Establishing MongoDB connection...')
     await Engine.connect_to_mongo()
 
+    if config.mongo_index_background:
+        service.tasks.append(asyncio.create_task(reconcile_indexes(service)))
+
+    else:
+        await reconcile_indexes(service)
+
+    if config.trusted_documents:
+        service.tasks.append(asyncio.create_task(trust_documents(service)))
+
+    if ITEM_CACHE is not None:
+        service.logger.info('Watching api_db.items changes for the Item cache...')
+        service.tasks.append(asyncio.create_task(CacheWatcher(ITEM_CACHE).run()))
+
+
+# ---------------------------------------------------------
+#
+async def startup(service: Service):
+    """ Start the Item repository backend and the background tasks.
+
+    MongoDB is not used when the in-memory Item repository is
+    configured. The used resources are probed periodically for the
+    health endpoints. When the metrics are shared between gunicorn
+    workers, the pool and cache metrics are published periodically.
+    """
+    if config.item_repository == 'mongo':
+        await start_mongo(service)
+
+    else:
+        service.logger.warning('Using the in-memory Item store, the Items are lost '
+                               'at a restart and not shared between workers '
+                               '(run a single worker).')
+
+    service.tasks.append(asyncio.create_task(HEALTH_MANAGER.run()))
+
+    if MULTIPROCESS:
+        service.tasks.append(asyncio.create_task(
+            STATS.run(config.metrics_publish_interval)))
+
 
 # ---------------------------------------------------------
 #
 async def shutdown(service: Service):
-    """ Close DB connection. """
-    service.logger.info('Disconnecting from MongoDB...')
-    await Engine.close_mongo_connection()
+    """ Cancel background tasks, close DB connection and flush the log repetitions. """
+    for task in service.tasks:
+        task.cancel()
+
+    await asyncio.gather(*service.tasks, return_exceptions=True)
+    service.tasks.clear()
+
+    if Engine.client is not None:
+        service.logger.info('Disconnecting from MongoDB...')
+        await Engine.close_mongo_connection()
+
+    # Log the repetition counts that are still pending.
+    stop_repeat_filter()
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import os
+import time
+import asyncio
+from typing import Optional
+
+# Third party modules
+from pymongo import monitoring
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+
+# Local modules
+from .cache import ItemCache
+from .pool_monitor import PoolMonitor
+from .custom_logging import REQUEST_START
+
+# Constants
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+""" Metrics are shared between gunicorn worker processes. """
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+""" Latency histogram buckets, in seconds. """
+REQUEST_LATENCY = Histogram('http_request_duration_seconds',
+                            'HTTP request latency, per route template and status code.',
+                            ('method', 'route', 'status'), buckets=LATENCY_BUCKETS)
+""" HTTP request latency histogram. """
+COMMAND_LATENCY = Histogram('mongodb_command_duration_seconds',
+                            'MongoDB command latency, per command name and outcome.',
+                            ('command', 'outcome'), buckets=LATENCY_BUCKETS)
+""" MongoDB command latency histogram. """
+
+
+# -----------------------------------------------------------------------------
+#
+class MetricsMiddleware:
+    """ Pure ASGI middleware that records the latency of every HTTP request.
+
+    The route template (like /v1/items/{item_id}) is used as a label,
+    instead of the request path, to keep the number of time series low.
+    FastAPI stores the matched route in the request scope. Requests for
+    other routes (documentation and static files) are labeled "other",
+    and requests that don't match any route are labeled "unmatched".
+
+    The request start time is also stored for the access log sampling.
+
+    :ivar app: Wrapped ASGI application.
+    """
+
+    def __init__(self, app):
+        """ Implicit constructor.
+
+        :param app: Wrapped ASGI application.
+        """
+        self.app = app
+
+    # ---------------------------------------------------------
+    #
+    async def __call__(self, scope: dict, receive, send):
+        """ Call the wrapped application and record the request latency.
+
+        :param scope: ASGI connection scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status = 500
+        start = time.perf_counter()
+        REQUEST_START.set(start)
+
+        async def send_wrapper(message: dict):
+            """ Catch the response status code. """
+            nonlocal status
+
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+
+        finally:
+            route = scope.get('route')
+            template = (route.path if route is not None
+                        else 'other' if 'endpoint' in scope else 'unmatched')
+            REQUEST_LATENCY.labels(scope['method'], template, status).observe(
+                time.perf_counter() - start)
+
+
+# -----------------------------------------------------------------------------
+#
+class CommandMonitor(monitoring.CommandListener):
+    """ Record the latency of every MongoDB command, per command name. """
+
+    # ---------------------------------------------------------
+    #
+    def started(self, event: monitoring.CommandStartedEvent):
+        """ Not used, the duration is part of the finished events. """
+
+    # ---------------------------------------------------------
+    #
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        """ Record a successful command. """
+        COMMAND_LATENCY.labels(event.command_name, 'succeeded').observe(
+            event.duration_micros / 1e6)
+
+    # ---------------------------------------------------------
+    #
+    def failed(self, event: monitoring.CommandFailedEvent):
+        """ Record a failed command. """
+        COMMAND_LATENCY.labels(event.command_name, 'failed').observe(
+            event.duration_micros / 1e6)
+
+
+# -----------------------------------------------------------------------------
+#
+class StatsPublisher:
+    """ Publish the connection pool and Item cache counters as metrics.
+
+    The counters are published on demand instead of on every change, so
+    nothing is added to the request path. Cumulative counters are added
+    as the change since the previous publish, so that the totals of a
+    dead worker are kept in multiprocess mode. The current values are
+    only summed for live workers.
+
+    :ivar pool: Connection pool telemetry.
+    :ivar cache: Possible Item cache.
+    """
+
+    def __init__(self, pool: PoolMonitor, cache: Optional[ItemCache],
+                 registry: CollectorRegistry = REGISTRY):
+        """ Implicit constructor.
+
+        :param pool: Connection pool telemetry.
+        :param cache: Possible Item cache.
+        :param registry: Metrics registry.
+        """
+        self.pool = pool
+        self.cache = cache
+        self._published = {}
+        self._connections = Gauge('mongodb_pool_connections',
+                                  'MongoDB pool connections, per state.', ('state',),
+                                  multiprocess_mode='livesum', registry=registry)
+        self._wait_max = Gauge('mongodb_pool_checkout_wait_max_seconds',
+                               'Longest wait for a MongoDB pool connection.',
+                               multiprocess_mode='livemax', registry=registry)
+        self._counters = {
+            name: Counter(f'mongodb_pool_{name}', f'MongoDB pool connection {text}.',
+                          registry=registry)
+            for name, text in (('checkouts', 'checkouts'),
+                               ('checkout_failures', 'checkout failures'),
+                               ('checkout_timeouts', 'checkout wait queue timeouts'))
+        }
+        self._counters['wait_time_total'] = Counter(
+            'mongodb_pool_checkout_wait_seconds',
+            'Time spent waiting for a MongoDB pool connection.', registry=registry)
+
+        if cache is not None:
+            self._cache_size = Gauge('item_cache_size', 'Number of cached Items.',
+                                     multiprocess_mode='livesum', registry=registry)
+
+            for name in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+                self._counters[f'cache_{name}'] = Counter(f'item_cache_{name}',
+                                                          f'Item cache {name}.',
+                                                          registry=registry)
+
+    # ---------------------------------------------------------
+    #
+    def _add(self, name: str, value: float):
+        """ Add the change since the previous publish to a counter.
+
+        :param name: Counter name.
+        :param value: Current counter value.
+        """
+        self._counters[name].inc(value - self._published.get(name, 0))
+        self._published[name] = value
+
+    # ---------------------------------------------------------
+    #
+    def publish(self):
+        """ Publish the current pool and cache counters. """
+        pool = self.pool.stats()
+        self._connections.labels('open').set(pool.size)
+        self._connections.labels('checked_out').set(pool.checked_out)
+        self._connections.labels('waiting').set(pool.waiting)
+        self._wait_max.set(pool.wait_time_max)
+
+        for name in ('checkouts', 'checkout_failures', 'checkout_timeouts', 'wait_time_total'):
+            self._add(name, getattr(pool, name))
+
+        if self.cache is None:
+            return
+
+        cache = self.cache.stats()
+        self._cache_size.set(cache.size)
+
+        for name in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+            self._add(f'cache_{name}', getattr(cache, name))
+
+    # ---------------------------------------------------------
+    #
+    async def run(self, interval: float):
+        """ Publish the counters periodically until the task is cancelled.
+
+        This is needed in multiprocess mode, where a scrape is handled by
+        one worker and the other workers must already have published.
+
+        :param interval: Number of seconds between publishing.
+        """
+        while True:
+            self.publish()
+            await asyncio.sleep(interval)
+
+
+# ---------------------------------------------------------
+#
+def metrics_registry() -> CollectorRegistry:
+    """ Return the registry with the metrics of all worker processes.
+
+    In multiprocess mode (gunicorn) every worker writes its metrics to
+    memory-mapped files in the PROMETHEUS_MULTIPROC_DIR directory, and
+    the files are aggregated when the metrics are collected.
+
+    :return: Metrics registry.
+    """
+    if not MULTIPROCESS:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
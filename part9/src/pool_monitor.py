@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import time
+import threading
+from typing import NamedTuple
+
+# Third party modules
+from pymongo import monitoring
+
+
+# ---------------------------------------------------------
+#
+class PoolStats(NamedTuple):
+    """ MongoDB connection pool counters, for all servers.
+
+    :ivar size: Number of open connections.
+    :ivar checked_out: Number of connections in use.
+    :ivar waiting: Number of operations waiting for a connection.
+    :ivar checkouts: Number of successful connection checkouts.
+    :ivar checkout_failures: Number of failed connection checkouts.
+    :ivar checkout_timeouts: Number of checkouts that failed on the wait queue timeout.
+    :ivar wait_time_total: Number of seconds spent waiting for a connection.
+    :ivar wait_time_max: Longest wait for a connection, in seconds.
+    """
+    size: int
+    checked_out: int
+    waiting: int
+    checkouts: int
+    checkout_failures: int
+    checkout_timeouts: int
+    wait_time_total: float
+    wait_time_max: float
+
+
+# -----------------------------------------------------------------------------
+#
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """ Record MongoDB connection pool telemetry from pymongo pool events.
+
+    Motor runs the pymongo operations in executor threads, and a checkout
+    starts and ends in the same thread. The checkout start time is
+    therefore kept per thread, and the counters are protected by a lock.
+    """
+
+    def __init__(self):
+        """ Implicit constructor. """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._size = self._checked_out = self._waiting = 0
+        self._checkouts = self._checkout_failures = self._checkout_timeouts = 0
+        self._wait_time_total = self._wait_time_max = 0.0
+
+    # ---------------------------------------------------------
+    #
+    def _checkout_ended(self) -> float:
+        """ Return the checkout wait time for the current thread.
+
+        :return: Number of seconds spent waiting for a connection.
+        """
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        return 0.0 if started is None else time.perf_counter() - started
+
+    # ---------------------------------------------------------
+    #
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent):
+        """ Start timing the checkout wait. """
+        self._local.started = time.perf_counter()
+
+        with self._lock:
+            self._waiting += 1
+
+    # ---------------------------------------------------------
+    #
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent):
+        """ Record a successful checkout and its wait time. """
+        wait_time = self._checkout_ended()
+
+        with self._lock:
+            self._waiting -= 1
+            self._checkouts += 1
+            self._checked_out += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+
+    # ---------------------------------------------------------
+    #
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent):
+        """ Record a failed checkout and its wait time. """
+        wait_time = self._checkout_ended()
+
+        with self._lock:
+            self._waiting -= 1
+            self._checkout_failures += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self._checkout_timeouts += 1
+
+    # ---------------------------------------------------------
+    #
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent):
+        """ Record a returned connection. """
+        with self._lock:
+            self._checked_out -= 1
+
+    # ---------------------------------------------------------
+    #
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent):
+        """ Record a new connection. """
+        with self._lock:
+            self._size += 1
+
+    # ---------------------------------------------------------
+    #
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent):
+        """ Record a closed connection. """
+        with self._lock:
+            self._size -= 1
+
+    # ---------------------------------------------------------
+    #
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent):
+        """ Not used. """
+
+    # ---------------------------------------------------------
+    #
+    def pool_created(self, event: monitoring.PoolCreatedEvent):
+        """ Not used. """
+
+    # ---------------------------------------------------------
+    #
+    def pool_ready(self, event: monitoring.PoolReadyEvent):
+        """ Not used. """
+
+    # ---------------------------------------------------------
+    #
+    def pool_cleared(self, event: monitoring.PoolClearedEvent):
+        """ Not used, the cleared connections are reported when they are closed. """
+
+    # ---------------------------------------------------------
+    #
+    def pool_closed(self, event: monitoring.PoolClosedEvent):
+        """ Not used. """
+
+    # ---------------------------------------------------------
+    #
+    def stats(self) -> PoolStats:
+        """ Return the pool counters.
+
+        :return: Pool counters.
+        """
+        with self._lock:
+            return PoolStats(size=self._size, checked_out=self._checked_out,
+                             waiting=self._waiting, checkouts=self._checkouts,
+                             checkout_failures=self._checkout_failures,
+                             checkout_timeouts=self._checkout_timeouts,
+                             wait_time_total=self._wait_time_total,
+                             wait_time_max=self._wait_time_max)
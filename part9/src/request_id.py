@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import re
+from uuid import uuid4
+
+# Local modules
+from .custom_logging import REQUEST_ID, REQUEST_METHOD
+
+# Constants
+HEADER = b'x-request-id'
+""" Request ID HTTP header name (lowercase, as in the ASGI scope). """
+VALID_ID = re.compile(r'[\w.:\-]{1,128}')
+""" Accepted format for a request ID from the client. """
+
+
+# -----------------------------------------------------------------------------
+#
+class RequestIdMiddleware:
+    """ Pure ASGI middleware that gives every HTTP request an identity.
+
+    A valid X-Request-ID header from the client is used, otherwise a new
+    ID is created. The ID is returned in the X-Request-ID response header,
+    and it's stored in the REQUEST_ID context variable, where it's picked
+    up by the log records and the MongoDB command comments.
+
+    :ivar app: Wrapped ASGI application.
+    """
+
+    def __init__(self, app):
+        """ Implicit constructor.
+
+        :param app: Wrapped ASGI application.
+        """
+        self.app = app
+
+    # ---------------------------------------------------------
+    #
+    async def __call__(self, scope: dict, receive, send):
+        """ Call the wrapped application with the request ID in context.
+
+        :param scope: ASGI connection scope.
+        :param receive: ASGI receive channel.
+        :param send: ASGI send channel.
+        """
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        request_id = None
+
+        for name, value in scope['headers']:
+            if name == HEADER:
+                request_id = value.decode('latin-1')
+                break
+
+        if request_id is None or not VALID_ID.fullmatch(request_id):
+            request_id = uuid4().hex
+
+        REQUEST_ID.set(request_id)
+        REQUEST_METHOD.set(scope['method'])
+        header = (HEADER, request_id.encode('latin-1'))
+
+        async def send_wrapper(message: dict):
+            """ Add the request ID to the response headers. """
+            if message['type'] == 'http.response.start':
+                message['headers'] = [*message.get('headers', ()), header]
+
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -13,15 +13,18 @@ VERSION INFO::
 # BUILTIN modules
 from uuid import UUID
 from enum import Enum
-from typing import List, Optional, Callable
+from datetime import datetime
+from functools import cache
+from typing import List, Optional, Callable, ClassVar
 
 # Third party modules
 from uuid_extensions import uuid7
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, SerializeAsAny, model_serializer
 
 # Local modules
 from .config.setup import config
-from .api.documentation import (item_example, query_example, resource_example)
+from .api.documentation import (item_example, query_example,
+                                bulk_example, resource_example)
 
 
 # ------------------------------------------------------------------------
@@ -32,6 +35,11 @@ class DbOperationFailedError(BaseModel):
     detail: str = "DB operation failed"
 
 
+class InvalidCursorError(BaseModel):
+    """ Define model for the http 400 exception (BAD_REQUEST). """
+    detail: str = "Invalid page cursor"
+
+
 class NotFoundError(BaseModel):
     """ Define a model for the http 404 exception (NOT_FOUND). """
     detail: str = "Item not found in DB"
@@ -56,13 +64,47 @@ class MongoBase(BaseModel):
 
     MongoDB uses `_id` as an internal default index key.
     We can use that to our advantage.
+
+    :ivar trusted: Build models from DB documents without validation.
     """
     model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+    trusted: ClassVar[bool] = False
+
+    @classmethod
+    @cache
+    def _converters(cls) -> dict:
+        """ Return the converters for field values that differ from their DB value.
+
+        The DB stores UUID and Enum values as strings, and they have to be
+        converted when validation is skipped. An Enum is converted with a
+        value lookup, since that is a lot faster than calling the Enum.
+
+        :return: Converter per field name.
+        """
+        converters = {}
+
+        for name, field in cls.model_fields.items():
+
+            if not isinstance(field.annotation, type):
+                continue
+
+            elif issubclass(field.annotation, Enum):
+                converters[name] = {member.value: member
+                                    for member in field.annotation}.__getitem__
+
+            elif issubclass(field.annotation, UUID):
+                converters[name] = field.annotation
+
+        return converters
 
     @classmethod
     def from_mongo(cls, data: dict) -> Callable:
         """ Convert "_id" (str object) into "id" (UUID object).
 
+        A trusted model is built without validation. That is only safe
+        when the collection has a matching $jsonSchema validator (see
+        mongo_json_schema) and all existing documents match it.
+
         :param data: Current model as a dict.
         :return: Converted MongoDB model object to current model.
         """
@@ -71,8 +113,61 @@ class MongoBase(BaseModel):
             return data
 
         mongo_id = data.pop('_id', None)
+
+        if cls.trusted:
+            data['id'] = mongo_id
+
+            for key, convert in cls._converters().items():
+                data[key] = convert(data[key])
+
+            # Same result as model_construct(), without its default
+            # value handling that costs more than the validation.
+            model = cls.__new__(cls)
+            object.__setattr__(model, '__dict__', data)
+            object.__setattr__(model, '__pydantic_fields_set__', set(data))
+            object.__setattr__(model, '__pydantic_extra__', None)
+            object.__setattr__(model, '__pydantic_private__', None)
+            return model
+
         return cls(**dict(data, id=mongo_id))
 
+    @classmethod
+    def mongo_json_schema(cls) -> dict:
+        """ Return a MongoDB $jsonSchema that matches the documents of this model.
+
+        It's derived from the model JSON schema, and every field is
+        required since to_mongo() always stores all of them.
+
+        :return: MongoDB $jsonSchema.
+        """
+        schema = cls.model_json_schema()
+        definitions = schema.get('$defs', {})
+        bson_types = {'string': 'string', 'integer': ['int', 'long'],
+                      'number': ['double', 'int', 'long']}
+        properties = {}
+
+        for name, prop in schema['properties'].items():
+
+            if '$ref' in prop:
+                prop = definitions[prop['$ref'].split('/')[-1]]
+
+            item = {'bsonType': bson_types[prop['type']]}
+
+            for key in ('enum', 'minimum', 'minLength', 'maxLength'):
+                if key in prop:
+                    item[key] = prop[key]
+
+            if 'exclusiveMinimum' in prop:
+                item |= {'minimum': prop['exclusiveMinimum'], 'exclusiveMinimum': True}
+
+            if prop.get('format') == 'uuid':
+                item['pattern'] = '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+
+            properties['_id' if name == 'id' else name] = item
+
+        return {'bsonType': 'object', 'required': list(properties),
+                'properties': properties, 'additionalProperties': False}
+
     def to_mongo(self, **kwargs) -> dict:
         """ Convert "id" (UUID object) into "_id" (str object).
 
@@ -112,6 +207,29 @@ class ItemModel(ItemPayload):
     id: UUID = Field(default_factory=uuid7)
 
 
+class PartialItemModel(MongoBase):
+    """ Representation of an item with a selection of its fields in the system.
+
+    Fields that are not selected are left out when the model is
+    serialized, and id is always selected.
+    """
+    model_config = ConfigDict(json_schema_extra={"example": item_example})
+    id: UUID
+    category: Optional[Category] = None
+    count: Optional[int] = None
+    price: Optional[float] = None
+    name: Optional[str] = None
+
+    @model_serializer(mode='wrap')
+    def _selected_fields(self, handler: Callable) -> dict:
+        """ Return the serialized model without the fields that are not selected.
+
+        :param handler: Default model serializer.
+        :return: Serialized selected fields.
+        """
+        return {key: value for key, value in handler(self).items() if value is not None}
+
+
 # -----------------------------------------------------------------------------
 #
 class QueryArguments(BaseModel):
@@ -122,11 +240,33 @@ class QueryArguments(BaseModel):
     category: Optional[Category] = None
 
 
+class UpdateArguments(BaseModel):
+    """ Representation of item update arguments in the system. """
+    name: Optional[str] = None
+    count: Optional[int] = None
+    price: Optional[float] = None
+
+
 class ItemArgumentResponse(BaseModel):
     """ Representation of an argument query response in the system. """
     model_config = ConfigDict(json_schema_extra={"example": query_example})
     query: QueryArguments = Field(description="Dictionary containing the user's query arguments")
-    selection: List[ItemModel] = Field(description="List of items that match the query arguments")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if any")
+    selection: List[SerializeAsAny[PartialItemModel]] = Field(
+        description="List of items that match the query arguments")
+
+
+class BulkItemError(BaseModel):
+    """ Representation of a failed item in a bulk create response. """
+    index: int = Field(description="Position of the item in the request payload")
+    detail: str = Field(description="Reason why the item was not created")
+
+
+class BulkCreateResponse(BaseModel):
+    """ Representation of a bulk create response in the system. """
+    model_config = ConfigDict(json_schema_extra={"example": bulk_example})
+    ids: List[Optional[UUID]] = Field(description="Item id per payload item, null when it failed")
+    errors: List[BulkItemError] = Field(description="List of payload items that were not created")
 
 
 # -----------------------------------------------------------------------------
@@ -136,9 +276,13 @@ class HealthResourceModel(BaseModel):
 
     :ivar name: Resource name.
     :ivar status: Resource status
+    :ivar latency: Probe latency, in seconds.
+    :ivar last_success: Time of the latest successful probe.
     """
     name: str
     status: bool
+    latency: Optional[float] = None
+    last_success: Optional[datetime] = None
 
 
 class HealthResponseModel(BaseModel):
@@ -18,6 +18,16 @@ from starlette.testclient import TestClient
 from ..src.main import app
 
 
+# ---------------------------------------------------------
+#
+def pytest_configure(config):
+    """ Register the custom markers. """
+
+    config.addinivalue_line(
+        "markers", "perf: per-request budget test, the latency and memory budgets are "
+        "only checked with PERF_BUDGETS=1, deselect with '-m \"not perf\"'")
+
+
 # ---------------------------------------------------------
 #
 @pytest.fixture(scope="module")
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# Local program modules
+from ..src.cache import ItemCache
+from ..src.cache_watcher import CacheWatcher
+from ..src.schemas import Category, ItemModel
+
+
+# ---------------------------------------------------------
+#
+def _item(name: str) -> ItemModel:
+    """ Return a new item. """
+
+    return ItemModel(name=name, price=9.99, count=20, category=Category.TOOLS)
+
+
+# ---------------------------------------------------------
+#
+def test_cache_hit_and_miss():
+    """ Test that a cached item is found and an unknown item is not. """
+
+    cache = ItemCache(max_size=2, ttl=60)
+    hammer, pliers = _item('Hammer'), _item('Pliers')
+    cache.put(hammer)
+
+    assert cache.get(hammer.id) is hammer
+    assert cache.get(pliers.id) is None
+    assert cache.stats()._asdict() == {'size': 1, 'hits': 1, 'misses': 1, 'evictions': 0,
+                                       'expirations': 0, 'invalidations': 0}
+
+
+# ---------------------------------------------------------
+#
+def test_cache_lru_eviction():
+    """ Test that the least recently used item is evicted when the cache is full. """
+
+    cache = ItemCache(max_size=2, ttl=60)
+    hammer, pliers, nails = _item('Hammer'), _item('Pliers'), _item('Nails')
+    cache.put(hammer)
+    cache.put(pliers)
+    cache.get(hammer.id)
+    cache.put(nails)
+
+    assert cache.get(pliers.id) is None
+    assert cache.get(hammer.id) is hammer
+    assert cache.stats().evictions == 1
+
+
+# ---------------------------------------------------------
+#
+def test_cache_expiration_and_invalidation():
+    """ Test that expired and invalidated items are removed. """
+
+    cache = ItemCache(max_size=2, ttl=-1)
+    hammer = _item('Hammer')
+    cache.put(hammer)
+
+    assert cache.get(hammer.id) is None
+    assert cache.stats().expirations == 1
+
+    cache.ttl = 60
+    cache.put(hammer)
+    cache.invalidate(hammer.id)
+
+    assert cache.get(hammer.id) is None
+    assert cache.stats().invalidations == 1
+
+
+# ---------------------------------------------------------
+#
+def test_cache_watcher_events():
+    """ Test that change stream events invalidate the cache. """
+
+    cache = ItemCache(max_size=2, ttl=60)
+    watcher = CacheWatcher(cache)
+    hammer, pliers = _item('Hammer'), _item('Pliers')
+    cache.put(hammer)
+    cache.put(pliers)
+
+    assert watcher._handle({'operationType': 'insert',
+                            'documentKey': {'_id': str(hammer.id)}}) is True
+    assert cache.get(hammer.id) is hammer
+
+    assert watcher._handle({'operationType': 'update',
+                            'documentKey': {'_id': str(hammer.id)}}) is True
+    assert cache.get(hammer.id) is None
+    assert cache.get(pliers.id) is pliers
+
+    assert watcher._handle({'operationType': 'drop'}) is False
+    assert cache.get(pliers.id) is None
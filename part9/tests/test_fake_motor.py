@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import time
+
+# Third party modules
+import pytest
+from pymongo.errors import BulkWriteError
+
+# Local program modules
+from ..src.db import Engine
+from ..src.config.setup import config
+from ..src.api.item_crud import ItemCrud
+from ..src.fake_motor import FakeMotorClient
+from ..src.schemas import (Category, ItemModel, ItemPayload,
+                           QueryArguments, UpdateArguments)
+
+# This is the same as using the @pytest.mark.anyio on all test functions in the module
+pytestmark = pytest.mark.anyio
+
+
+# ---------------------------------------------------------
+#
+async def test_item_crud_on_fake_client():
+    """ Test the Item operations, and their round trips, on the fake client. """
+
+    client = FakeMotorClient()
+    crud = ItemCrud(collection=client.api_db.items)
+    hammer = await crud.create(ItemPayload(name='Hammer', price=9.99, count=20,
+                                           category=Category.TOOLS))
+    response = await crud.create_many(
+        [ItemPayload(name='hammer', price=5.0, count=2, category=Category.TOOLS),
+         ItemPayload(name='Glue', price=2.5, count=5, category=Category.CONSUMABLES)])
+
+    assert response.errors == []
+    assert await crud.read(hammer.id) == hammer
+    assert (await crud.read(hammer.id, {'name'})).model_dump() == {'id': hammer.id,
+                                                                   'name': 'Hammer'}
+    assert await crud.exists(hammer.id) is True
+    assert [item.id for item in await crud.query(QueryArguments(name='HAMMER'), 10)] == [
+        hammer.id, response.ids[0]]
+    assert [item.id for item in await crud.read_all(1, after=hammer.id)] == [
+        response.ids[0]]
+    assert [item.id async for item in crud.stream(2)] == [hammer.id, *response.ids]
+    assert (await crud.update(hammer.id, UpdateArguments(count=0))).count == 0
+    assert (await crud.delete(hammer.id)).deleted_count == 1
+    assert await crud.update(hammer.id, UpdateArguments(count=1)) is None
+    assert client.operations == {'insert': 2, 'find': 6, 'getMore': 1,
+                                 'findAndModify': 2, 'delete': 1}
+
+
+# ---------------------------------------------------------
+#
+async def test_fake_client_duplicate_keys():
+    """ Test that duplicate ids are reported per document in an unordered insert. """
+
+    collection = FakeMotorClient().api_db.items
+    item = ItemModel(name='Hammer', price=9.99, count=20, category=Category.TOOLS)
+    await collection.insert_one(item.to_mongo())
+
+    with pytest.raises(BulkWriteError) as why:
+        await collection.insert_many([item.to_mongo(), item.to_mongo()], ordered=False)
+
+    assert [error['index'] for error in why.value.details['writeErrors']] == [0, 1]
+
+
+# ---------------------------------------------------------
+#
+async def test_engine_on_fake_client(monkeypatch):
+    """ Test the Engine DB setup, and the injected latency, on the fake client. """
+
+    monkeypatch.setattr(config, 'mongo_fake', True)
+    monkeypatch.setattr(config, 'mongo_fake_latency', 0.01)
+    monkeypatch.setattr(Engine, 'client', None)
+    monkeypatch.setattr(Engine, 'db', None)
+    monkeypatch.setattr(Engine, 'items', None)
+    await Engine.connect_to_mongo()
+
+    assert isinstance(Engine.client, FakeMotorClient)
+
+    start = time.perf_counter()
+
+    assert await Engine.is_db_connected() is True
+    assert time.perf_counter() - start >= 0.01
+
+    report = await Engine.reconcile_indexes()
+
+    assert 'name_ci' in report.created
+    assert all(index['key'][-1] == ('_id', 1)
+               for index in (await Engine.items.index_information()).values())
+    assert (await Engine.reconcile_indexes()).created == []
+    assert await Engine.apply_validator(ItemModel.mongo_json_schema()) is True
+
+    async with Engine.items.watch(max_await_time_ms=10) as stream:
+        await Engine.items.insert_one({'_id': 'key'})
+        change = await stream.try_next()
+
+        assert change['operationType'] == 'insert'
+        assert change['documentKey'] == {'_id': 'key'}
+        assert await stream.try_next() is None
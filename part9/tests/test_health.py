@@ -10,11 +10,18 @@ VERSION INFO::
      $Rev: 9
 """
 
+# BUILTIN modules
+import time
+import asyncio
+
 # Third party modules
 import pytest
 from starlette.testclient import TestClient
 from httpx import AsyncClient, ASGITransport
 
+# Local program modules
+from ..src.health_manager import HEALTH_MANAGER, HealthProbe, HealthManager
+
 # This is the same as using the @pytest.mark.anyio
 # on all test functions in the module
 pytestmark = pytest.mark.anyio
@@ -22,11 +29,34 @@ pytestmark = pytest.mark.anyio
 
 # ---------------------------------------------------------
 #
-async def test_normal_health(test_app: TestClient):
+@pytest.fixture(autouse=True)
+def reset_health_status():
+    """ Function fixture, that removes the cached health status of a test. """
+
+    yield
+
+    HEALTH_MANAGER.status = None
+    HEALTH_MANAGER.updated = 0.0
+
+
+# ---------------------------------------------------------
+#
+async def test_normal_health(test_app: TestClient, monkeypatch):
     """ Test successful health endpoint.
 
     :param test_app: TestClient instance.
     """
+
+    async def mock_is_db_connected():
+        """ Monkeypatch """
+        return True
+
+    monkeypatch.setitem(HEALTH_MANAGER.probes, 'MongoDb',
+                        HealthProbe('MongoDb', mock_is_db_connected, 1))
+
+    # ---------------------------------
+
+    await HEALTH_MANAGER.probe()
     transport = ASGITransport(app=test_app.app)
 
     async with AsyncClient(transport=transport,
@@ -39,11 +69,22 @@ async def test_normal_health(test_app: TestClient):
 
 # ---------------------------------------------------------
 #
-async def test_health_error(test_app: TestClient):
+async def test_health_error(test_app: TestClient, monkeypatch):
     """ Test failed health endpoint.
 
     :param test_app: TestClient instance.
     """
+
+    async def mock_is_db_connected():
+        """ Monkeypatch """
+        raise ConnectionError('MongoDb is down')
+
+    monkeypatch.setitem(HEALTH_MANAGER.probes, 'MongoDb',
+                        HealthProbe('MongoDb', mock_is_db_connected, 1))
+
+    # ---------------------------------
+
+    await HEALTH_MANAGER.probe()
     transport = ASGITransport(app=test_app.app)
 
     async with AsyncClient(transport=transport,
@@ -52,3 +93,110 @@ async def test_health_error(test_app: TestClient):
 
     assert response.status_code == 500
     assert response.json()['status'] is False
+    assert response.json()['resources'][0]['latency'] is not None
+
+
+# ---------------------------------------------------------
+#
+async def test_not_ready_before_first_probe(test_app: TestClient, monkeypatch):
+    """ Test that the service is not ready, without probing, until the first probe.
+
+    :param test_app: TestClient instance.
+    """
+
+    async def mock_is_db_connected():
+        """ Monkeypatch """
+        raise AssertionError('probed on the request path')
+
+    monkeypatch.setitem(HEALTH_MANAGER.probes, 'MongoDb',
+                        HealthProbe('MongoDb', mock_is_db_connected, 1))
+    monkeypatch.setattr(HEALTH_MANAGER, 'status', None)
+
+    # ---------------------------------
+
+    response = test_app.get("/health/ready")
+
+    assert response.status_code == 503
+    assert response.json()['status'] is False
+    assert response.json()['resources'] == [
+        {'name': 'MongoDb', 'status': False, 'latency': None, 'last_success': None}]
+
+
+# ---------------------------------------------------------
+#
+async def test_liveness(test_app: TestClient):
+    """ Test that liveness is reported without checking any resources.
+
+    :param test_app: TestClient instance.
+    """
+    response = test_app.get("/health/live")
+
+    assert response.status_code == 200
+    assert response.json()['status'] is True
+    assert response.json()['resources'] == []
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize(
+    "connected, age, status_code",
+    [
+        [True, 0, 200],
+        [False, 0, 503],
+        [True, 3600, 503],
+    ]
+)
+async def test_readiness(test_app: TestClient, monkeypatch,
+                         connected, age, status_code):
+    """ Test that readiness is the cached probe status, unless it's stale.
+
+    :param test_app: TestClient instance.
+    """
+
+    async def mock_is_db_connected():
+        """ Monkeypatch """
+        return connected
+
+    monkeypatch.setitem(HEALTH_MANAGER.probes, 'MongoDb',
+                        HealthProbe('MongoDb', mock_is_db_connected, 1))
+
+    # ---------------------------------
+
+    await HEALTH_MANAGER.probe()
+    monkeypatch.setattr(HEALTH_MANAGER, "updated", HEALTH_MANAGER.updated - age)
+
+    response = test_app.get("/health/ready")
+
+    assert response.status_code == status_code
+    assert response.json()['resources'][0]['status'] is connected
+
+
+# ---------------------------------------------------------
+#
+async def test_concurrent_probes_with_timeout():
+    """ Test that a hung probe is timed out without delaying the other probes. """
+
+    async def hung():
+        """ Probe that never answers in time. """
+        await asyncio.sleep(10)
+        return True
+
+    async def healthy():
+        """ Probe that answers after a while. """
+        await asyncio.sleep(0.1)
+        return True
+
+    manager = HealthManager()
+    manager.register('Hung', hung, timeout=0.1)
+    manager.register('Healthy', healthy, timeout=1)
+
+    start = time.perf_counter()
+    status = await manager.probe()
+
+    assert time.perf_counter() - start < 0.5
+    assert status.status is False
+    assert [(item.name, item.status) for item in status.resources] == [('Hung', False),
+                                                                       ('Healthy', True)]
+    assert status.resources[0].last_success is None
+    assert status.resources[1].last_success is not None
+    assert status.resources[1].latency >= 0.1
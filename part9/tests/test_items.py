@@ -14,11 +14,18 @@ VERSION INFO::
 import pytest
 from fastapi import HTTPException
 from pymongo.results import DeleteResult
+from pymongo.errors import OperationFailure
 
 # Local program modules
+from ..src.db import Engine
 from ..src.config.setup import config
+from ..src.fake_motor import FakeMotorClient
+from ..src.api.dependencies import get_repository_crud
 from ..src.api.item_crud import ItemCrud
-from ..src.schemas import Category, ItemModel
+from ..src.api.pagination import encode_cursor
+from ..src.api.export import ndjson_chunks, csv_chunks
+from ..src.schemas import (Category, ItemModel, PartialItemModel, QueryArguments,
+                           BulkCreateResponse)
 
 # This is the same as using the @pytest.mark.anyio on all test functions in the module
 pytestmark = pytest.mark.anyio
@@ -92,6 +99,72 @@ async def test_create_item_db_error(test_app, monkeypatch):
     assert response.json()["detail"] == request_response
 
 
+# ---------------------------------------------------------
+#
+async def test_create_items_bulk(test_app, monkeypatch):
+    """ Test bulk create item documents with one failed item. """
+
+    test_data = [
+        {"name": "Hammer", "price": 9.99, "count": 20, "category": "tools"},
+        {"name": "Nails", "price": 1.99, "count": 100, "category": "consumables"},
+    ]
+    test_response_payload = {
+        "ids": ["dbb86c27-2eed-410d-881e-ad47487dd228", None],
+        "errors": [{"index": 1, "detail": "E11000 duplicate key error"}]
+    }
+
+    # ---------------------------------
+
+    async def mock_create_many(_, payloads):
+        """ Monkeypatch """
+        assert [payload.name for payload in payloads] == ["Hammer", "Nails"]
+        return BulkCreateResponse.model_validate(test_response_payload)
+
+    monkeypatch.setattr(ItemCrud, "create_many", mock_create_many)
+
+    # ---------------------------------
+
+    response = test_app.post(f"{URL}/bulk", headers=AUTH, json=test_data)
+    assert response.status_code == 201
+    assert response.json() == test_response_payload
+
+
+# ---------------------------------------------------------
+#
+async def test_create_items_bulk_invalid_item(test_app, monkeypatch):
+    """ Test bulk create item documents with one invalid and one failed item. """
+
+    test_data = [
+        {"name": "Hammer", "price": 9.99, "count": 20, "category": "tools"},
+        {"name": "Saw", "price": 0, "count": 20, "category": "tools"},
+        {"name": "Nails", "price": 1.99, "count": 100, "category": "consumables"},
+        {"name": "Glue", "price": 2.5, "count": 5, "category": "consumables"},
+    ]
+
+    # ---------------------------------
+
+    async def mock_create_many(_, payloads):
+        """ Monkeypatch """
+        assert [payload.name for payload in payloads] == ["Hammer", "Nails", "Glue"]
+        return BulkCreateResponse(
+            ids=['dbb86c27-2eed-410d-881e-ad47487dd228', None,
+                 'dbb86c27-2eed-410d-881e-ad47487dd229'],
+            errors=[{"index": 1, "detail": "E11000 duplicate key error"}])
+
+    monkeypatch.setattr(ItemCrud, "create_many", mock_create_many)
+
+    # ---------------------------------
+
+    response = test_app.post(f"{URL}/bulk", headers=AUTH, json=test_data)
+    assert response.status_code == 201
+    assert response.json() == {
+        "ids": ["dbb86c27-2eed-410d-881e-ad47487dd228", None, None,
+                "dbb86c27-2eed-410d-881e-ad47487dd229"],
+        "errors": [{"index": 1, "detail": "price: Input should be greater than 0"},
+                   {"index": 2, "detail": "E11000 duplicate key error"}]
+    }
+
+
 # ---------------------------------------------------------
 #
 async def test_read_all_item_documents(test_app, monkeypatch):
@@ -116,7 +189,7 @@ async def test_read_all_item_documents(test_app, monkeypatch):
 
     # ---------------------------------
 
-    async def mock_read_all(_):
+    async def mock_read_all(_, *__):
         """ Monkeypatch """
         return test_data
 
@@ -129,6 +202,152 @@ async def test_read_all_item_documents(test_app, monkeypatch):
     assert response.json() == test_data
 
 
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize("fast_serialization", [True, False])
+async def test_read_all_item_serialization(test_app, monkeypatch, fast_serialization):
+    """ Test that the fast and the validated serialization give the same response. """
+
+    test_data = [
+        ItemModel(
+            id='dbb86c27-2eed-410d-881e-ad47487dd228',
+            name="Hammer", price=9.99, count=20, category=Category.TOOLS,
+        ),
+        PartialItemModel(id='32c1383a-b79e-43c1-8313-c8704382c48a', count=50),
+    ]
+    test_response_payload = [
+        {
+            "count": 20,
+            "price": 9.99,
+            "name": "Hammer",
+            "category": "tools",
+            "id": "dbb86c27-2eed-410d-881e-ad47487dd228"
+        },
+        {
+            "count": 50,
+            "id": "32c1383a-b79e-43c1-8313-c8704382c48a"
+        }
+    ]
+
+    # ---------------------------------
+
+    async def mock_read_all(_, *__):
+        """ Monkeypatch """
+        return test_data
+
+    monkeypatch.setattr(ItemCrud, "read_all", mock_read_all)
+    monkeypatch.setattr(config, "fast_serialization", fast_serialization)
+
+    # ---------------------------------
+
+    response = test_app.get(f"{URL}?limit=2", headers=AUTH)
+    assert response.status_code == 200
+    assert response.json() == test_response_payload
+    assert 'next' in response.links
+
+
+# ---------------------------------------------------------
+#
+async def test_read_all_item_documents_next_page(test_app, monkeypatch):
+    """ Test read a full page of item documents. """
+
+    test_data = [
+        ItemModel(
+            id='dbb86c27-2eed-410d-881e-ad47487dd228',
+            name="Hammer", price=9.99, count=20, category=Category.TOOLS,
+        )
+    ]
+    cursor = encode_cursor(test_data[-1].id)
+
+    # ---------------------------------
+
+    async def mock_read_all(_, __, after, ___):
+        """ Monkeypatch """
+        assert after == test_data[-1].id
+        return test_data
+
+    monkeypatch.setattr(ItemCrud, "read_all", mock_read_all)
+
+    # ---------------------------------
+
+    response = test_app.get(f"{URL}?limit=1&after={cursor}", headers=AUTH)
+    assert response.status_code == 200
+    assert response.links['next']['url'].endswith(f"after={cursor}")
+
+
+# ---------------------------------------------------------
+#
+async def test_read_all_item_cursor_error(test_app, monkeypatch):
+    """ Test read all item documents with an invalid page cursor. """
+
+    response = test_app.get(f"{URL}?after=maja", headers=AUTH)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid page cursor cursor='maja'"
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize(
+    "accept, content",
+    [
+        ["application/x-ndjson",
+         '{"category":"tools","count":20,"price":9.99,"name":"Hammer",'
+         '"id":"dbb86c27-2eed-410d-881e-ad47487dd228"}\n'
+         '{"category":"tools","count":50,"price":5.99,"name":"Pliers",'
+         '"id":"32c1383a-b79e-43c1-8313-c8704382c48a"}\n'],
+        ["text/csv",
+         'id,name,category,price,count\r\n'
+         'dbb86c27-2eed-410d-881e-ad47487dd228,Hammer,tools,9.99,20\r\n'
+         '32c1383a-b79e-43c1-8313-c8704382c48a,Pliers,tools,5.99,50\r\n'],
+    ]
+)
+async def test_export_item_documents(test_app, monkeypatch, accept, content):
+    """ Test export all item documents as NDJSON and CSV. """
+
+    test_data = [
+        ItemModel(
+            id='dbb86c27-2eed-410d-881e-ad47487dd228',
+            name="Hammer", price=9.99, count=20, category=Category.TOOLS,
+        ),
+        ItemModel(
+            id='32c1383a-b79e-43c1-8313-c8704382c48a',
+            name="Pliers", price=5.99, count=50, category=Category.TOOLS,
+        ),
+    ]
+
+    # ---------------------------------
+
+    async def mock_stream(_, __):
+        """ Monkeypatch """
+        for item in test_data:
+            yield item
+
+    monkeypatch.setattr(ItemCrud, "stream", mock_stream)
+
+    # ---------------------------------
+
+    response = test_app.get(f"{URL}/export?batch_size=1",
+                            headers=AUTH | {'Accept': accept})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith(accept)
+    assert response.text == content
+
+
+# ---------------------------------------------------------
+#
+async def test_export_first_chunk():
+    """ Test that the export starts with the header and the first item, then batches. """
+
+    async def items():
+        """ Return five Items. """
+        for count in range(5):
+            yield ItemModel(name="Hammer", price=9.99, count=count, category=Category.TOOLS)
+
+    assert [chunk.count('\n') async for chunk in ndjson_chunks(items(), 3)] == [1, 3, 1]
+    assert [chunk.count('\n') async for chunk in csv_chunks(items(), 3)] == [1, 1, 3, 1]
+    assert [chunk async for chunk in csv_chunks(items(), 3)][0] == 'id,name,category,price,count\r\n'
+
+
 # ---------------------------------------------------------
 #
 async def test_read_item_document(test_app, monkeypatch):
@@ -141,7 +360,7 @@ async def test_read_item_document(test_app, monkeypatch):
 
     # ---------------------------------
 
-    async def mock_read(_, __):
+    async def mock_read(_, __, ___):
         """ Monkeypatch """
         return test_data
 
@@ -154,6 +373,61 @@ async def test_read_item_document(test_app, monkeypatch):
     assert response.json() == test_data
 
 
+# ---------------------------------------------------------
+#
+async def test_read_item_document_fields(test_app, monkeypatch):
+    """ Test read selected fields of an item document. """
+
+    test_data = {"id": 'dbb86c27-2eed-410d-881e-ad47487dd228', "count": 20}
+
+    # ---------------------------------
+
+    async def mock_read(_, __, fields):
+        """ Monkeypatch """
+        assert fields == {"id", "count"}
+        return PartialItemModel(**test_data)
+
+    monkeypatch.setattr(ItemCrud, "read", mock_read)
+
+    # ---------------------------------
+
+    response = test_app.get(f"{URL}/dbb86c27-2eed-410d-881e-ad47487dd228?fields=id,count",
+                            headers=AUTH)
+    assert response.status_code == 200
+    assert response.json() == test_data
+
+
+# ---------------------------------------------------------
+#
+async def test_read_item_fields_error(test_app, monkeypatch):
+    """ Test read item document with an unknown field. """
+
+    response = test_app.get(f"{URL}/dbb86c27-2eed-410d-881e-ad47487dd228?fields=id,stock",
+                            headers=AUTH)
+    assert response.status_code == 422
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize("exists, status_code", [[True, 200], [False, 404]])
+async def test_item_exists(test_app, monkeypatch, exists, status_code):
+    """ Test item existence check. """
+
+    # ---------------------------------
+
+    async def mock_exists(_, __):
+        """ Monkeypatch """
+        return exists
+
+    monkeypatch.setattr(ItemCrud, "exists", mock_exists)
+
+    # ---------------------------------
+
+    response = test_app.head(f"{URL}/dbb86c27-2eed-410d-881e-ad47487dd228", headers=AUTH)
+    assert response.status_code == status_code
+    assert response.text == ''
+
+
 # ---------------------------------------------------------
 #
 async def test_read_item_index_key_error(test_app, monkeypatch):
@@ -171,7 +445,7 @@ async def test_read_item_index_key_error(test_app, monkeypatch):
 
     # ---------------------------------
 
-    async def mock_read(_, __):
+    async def mock_read(_, __, ___):
         """ Monkeypatch """
         return 0
 
@@ -193,7 +467,7 @@ async def test_read_item_unknown_error(test_app, monkeypatch):
 
     # ---------------------------------
 
-    async def mock_read(_, __):
+    async def mock_read(_, __, ___):
         """ Monkeypatch """
         return 0
 
@@ -224,6 +498,7 @@ async def test_query_item_document(test_app, monkeypatch):
             "name": "Hammer",
             "category": "tools"
         },
+        "next_cursor": None,
         "selection": [
             {
                 "count": 20,
@@ -237,7 +512,7 @@ async def test_query_item_document(test_app, monkeypatch):
 
     # ---------------------------------
 
-    async def mock_query(_, __):
+    async def mock_query(_, *__):
         """ Monkeypatch """
         return test_request_payload
 
@@ -289,10 +564,6 @@ async def test_query_invalid_category_error(test_app, monkeypatch):
 async def test_update_item_document(test_app, monkeypatch):
     """ Test update item document. """
 
-    test_request_payload = ItemModel(
-        id='dbb86c27-2eed-410d-881e-ad47487dd228',
-        name="Hammer", price=9.99, count=20, category=Category.TOOLS,
-    )
     test_response_payload = {
         "id": 'dbb86c27-2eed-410d-881e-ad47487dd228',
         "name": "Hammer", "price": 9.99, "count": 23, "category": "tools"
@@ -300,16 +571,9 @@ async def test_update_item_document(test_app, monkeypatch):
 
     # ---------------------------------
 
-    async def mock_read(_, __):
-        """ Monkeypatch """
-        return test_request_payload
-
-    monkeypatch.setattr(ItemCrud, "read", mock_read)
-
-    # ---------------------------------
-
-    async def mock_update(_, __):
+    async def mock_update(_, __, arguments):
         """ Monkeypatch """
+        assert arguments.model_dump(exclude_none=True) == {"count": 23}
         return test_response_payload
 
     monkeypatch.setattr(ItemCrud, "update", mock_update)
@@ -340,11 +604,11 @@ async def test_update_item_unknown_error(test_app, monkeypatch):
 
     # ---------------------------------
 
-    async def mock_read(_, __):
+    async def mock_update(_, __, ___):
         """ Monkeypatch """
-        return 0
+        return None
 
-    monkeypatch.setattr(ItemCrud, "read", mock_read)
+    monkeypatch.setattr(ItemCrud, "update", mock_update)
 
     # ---------------------------------
 
@@ -358,33 +622,47 @@ async def test_update_item_unknown_error(test_app, monkeypatch):
 async def test_update_item_failure(test_app, monkeypatch):
     """ Test update item document with db failure response. """
 
-    test_request_payload = ItemModel(
-        id='dbb86c27-2eed-410d-881e-ad47487dd228',
-        name="Hammer", price=9.99, count=20, category=Category.TOOLS,
-    )
-    request_response = "Failed updating item_id=UUID('dbb86c27-2eed-410d-881e-ad47487dd228') in api_db.items"
+    request_response = "Failed updating id='dbb86c27-2eed-410d-881e-ad47487dd228' in api_db.items"
 
     # ---------------------------------
 
-    async def mock_read(_, __):
+    async def mock_update(_, __, ___):
         """ Monkeypatch """
-        return test_request_payload
+        raise HTTPException(status_code=400, detail=request_response)
 
-    monkeypatch.setattr(ItemCrud, "read", mock_read)
+    monkeypatch.setattr(ItemCrud, "update", mock_update)
+
+    # ---------------------------------
+
+    response = test_app.put(f"{URL}/dbb86c27-2eed-410d-881e-ad47487dd228?count=23", headers=AUTH)
+    assert response.status_code == 400
+    assert response.json()["detail"] == request_response
+
+
+# ---------------------------------------------------------
+#
+async def test_update_item_validation_failure(test_app, monkeypatch):
+    """ Test update item document that fails the DB document validation. """
+
+    collection = FakeMotorClient().api_db.items
 
     # ---------------------------------
 
-    async def mock_update(_, __):
+    async def mock_find_one_and_update(*_, **__):
         """ Monkeypatch """
-        return 0
+        raise OperationFailure('Document failed validation', 121)
 
-    monkeypatch.setattr(ItemCrud, "update", mock_update)
+    monkeypatch.setattr(collection, "find_one_and_update", mock_find_one_and_update)
+    monkeypatch.setitem(test_app.app.dependency_overrides, get_repository_crud,
+                        lambda: ItemCrud(collection=collection))
 
     # ---------------------------------
 
     response = test_app.put(f"{URL}/dbb86c27-2eed-410d-881e-ad47487dd228?count=23", headers=AUTH)
     assert response.status_code == 400
-    assert response.json()["detail"] == request_response
+    assert response.json()["detail"] == ("Failed updating id='dbb86c27-2eed-410d-881e-"
+                                         "ad47487dd228' in api_db.items: Document "
+                                         "failed validation")
 
 
 # ---------------------------------------------------------
@@ -427,3 +705,78 @@ async def test_delete_item_unknown_error(test_app, monkeypatch):
     response = test_app.delete(f"{URL}/dbb86c27-2eed-410d-881e-ad47487dd228", headers=AUTH)
     assert response.status_code == 404
     assert response.json()["detail"] == request_response
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize(
+    "arguments, query_filter",
+    [
+        [{"name": "Hammer"}, {"name": "Hammer"}],
+        [{"category": Category.TOOLS}, {"category": "tools"}],
+        [{"price": 9.99, "count": 0}, {"price": 9.99, "count": 0}],
+        [{"name": "hammer", "category": Category.TOOLS},
+         {"name": "hammer", "category": "tools"}],
+    ]
+)
+async def test_query_filter(arguments, query_filter):
+    """ Test that query arguments are converted to a MongoDB filter. """
+
+    assert ItemCrud._query_filter(QueryArguments(**arguments)) == query_filter
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize(
+    "fields, projection",
+    [
+        [None, None],
+        [{"id"}, {"_id": 1}],
+        [{"id", "count"}, {"_id": 1, "count": 1}],
+    ]
+)
+async def test_projection(fields, projection):
+    """ Test that selected item fields are converted to a MongoDB projection. """
+
+    assert ItemCrud._projection(fields) == projection
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize("trusted", [False, True])
+async def test_from_mongo(monkeypatch, trusted):
+    """ Test that validated and trusted DB documents give the same item. """
+
+    item = ItemModel(name='Hammer', price=9.99, count=20, category=Category.TOOLS)
+    monkeypatch.setattr(ItemModel, 'trusted', trusted)
+    result = ItemModel.from_mongo(item.to_mongo())
+
+    assert result == item
+    assert isinstance(result.category, Category)
+    assert result.model_dump_json() == item.model_dump_json()
+
+
+# ---------------------------------------------------------
+#
+async def test_mongo_json_schema():
+    """ Test that the item $jsonSchema requires every stored field. """
+
+    schema = ItemModel.mongo_json_schema()
+
+    assert schema['additionalProperties'] is False
+    assert set(schema['required']) == {'_id', 'name', 'price', 'count', 'category'}
+    assert schema['properties']['category'] == {'bsonType': 'string',
+                                                'enum': ['tools', 'consumables']}
+    assert schema['properties']['price'] == {'bsonType': ['double', 'int', 'long'],
+                                             'minimum': 0.0, 'exclusiveMinimum': True}
+
+
+# ---------------------------------------------------------
+#
+async def test_repository_crud_without_session(test_app):
+    """ Test that the repository uses the shared collection without a DB session. """
+
+    crud = await get_repository_crud(await Engine.get_items_collection())
+
+    assert crud.session is None
+    assert crud.collection is Engine.items
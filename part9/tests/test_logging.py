@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import io
+import json
+import time
+import logging
+import threading
+from uuid import uuid4
+
+# Third party modules
+import pytest
+from loguru import logger
+
+# Local program modules
+from ..src.config.setup import config
+from ..src.api.item_crud import ItemCrud
+from ..src.custom_logging import (REQUEST_ID, REQUEST_START, AccessLogSampler, BatchedJsonSink,
+                                  InterceptHandler, RepeatFilter)
+
+
+# ---------------------------------------------------------
+#
+class BlockedStream(io.StringIO):
+    """ Stream where the first write waits until it's released. """
+
+    def __init__(self):
+        """ Implicit constructor. """
+        super().__init__()
+        self.entered = threading.Event()
+        self.released = threading.Event()
+
+    def write(self, text: str) -> int:
+        """ Wait until released before writing. """
+        self.entered.set()
+        self.released.wait(5)
+        return super().write(text)
+
+
+# ---------------------------------------------------------
+#
+def test_batched_json_sink():
+    """ Test that records are written as JSON, and that overflow is counted. """
+
+    stream = BlockedStream()
+    sink = BatchedJsonSink(stream, max_size=1, batch_size=10)
+    logger_id = logger.add(sink, format='{message}')
+
+    # The writer is blocked on the first record, so the second
+    # record fills the queue and the third record is dropped.
+    logger.bind(request_id='abc').info('first')
+    stream.entered.wait(5)
+    logger.info('second')
+    logger.info('third')
+    stream.released.set()
+    logger.remove(logger_id)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert sink.dropped == 1
+    assert (lines[0]['message'], lines[0]['request_id']) == ('first', 'abc')
+    assert lines[1]['message'] == '1 log records dropped, 1 in total'
+    assert lines[2]['message'] == 'second'
+
+
+# ---------------------------------------------------------
+#
+def test_intercept_handler_fast_mode():
+    """ Test that python logging records keep their logger name in fast mode. """
+
+    stream = io.StringIO()
+    logger_id = logger.add(BatchedJsonSink(stream, max_size=10, batch_size=10),
+                           format='{message}')
+    python_logger = logging.getLogger('test.access')
+    python_logger.handlers = [InterceptHandler(fast=True)]
+    python_logger.propagate = False
+    python_logger.warning('%s request', 'GET')
+    logger.remove(logger_id)
+
+    record = json.loads(stream.getvalue())
+
+    assert (record['message'], record['logger']) == ('GET request', 'test.access')
+
+
+# ---------------------------------------------------------
+#
+def test_access_log_sampler():
+    """ Test that errors and slow requests are kept when everything else is dropped. """
+
+    sampler = AccessLogSampler(rate=0.0, slow_after=1.0)
+
+    def access_record(status: int) -> logging.LogRecord:
+        """ Return a uvicorn access log record. """
+        return logging.LogRecord('uvicorn.access', logging.INFO, __file__, 1,
+                                 '%s - "%s %s HTTP/%s" %d',
+                                 ('127.0.0.1:5000', 'GET', '/v1/items', '1.1', status), None)
+
+    assert sampler.filter(access_record(200)) is False
+    assert sampler.filter(access_record(404)) is True
+    assert sampler.filter(access_record(500)) is True
+
+    token = REQUEST_START.set(time.perf_counter() - 2)
+    assert sampler.filter(access_record(200)) is True
+    REQUEST_START.reset(token)
+
+
+# ---------------------------------------------------------
+#
+def test_repeat_filter():
+    """ Test that repeated messages are collapsed into a repetition count. """
+
+    repeat_filter = RepeatFilter(window=60)
+    level = logger.level('CRITICAL')
+
+    def record(message: str) -> dict:
+        """ Return a loguru record. """
+        return {'level': level, 'message': message, 'extra': {}}
+
+    assert repeat_filter(record('MongoDb: down')) is True
+    assert repeat_filter(record('MongoDb: down')) is False
+    assert repeat_filter(record('MongoDb: down')) is False
+    assert repeat_filter(record('other')) is True
+
+    repeat_filter.window = 0
+    repeated = record('MongoDb: down')
+
+    assert repeat_filter(repeated) is True
+    assert repeated['message'] == 'MongoDb: down (repeated 2 times)'
+    repeat_filter.stop()
+
+
+# ---------------------------------------------------------
+#
+def test_repeat_filter_flush():
+    """ Test that the pending repetition counts are logged without a new occurrence. """
+
+    messages = []
+    repeat_filter = RepeatFilter(window=0.05)
+    logger_id = logger.add(messages.append, format='{message}', filter=repeat_filter)
+
+    for _ in range(3):
+        logger.warning('MongoDb: down')
+
+    logger.warning('other')
+    logger.warning('other')
+    time.sleep(0.3)
+
+    assert messages == ['MongoDb: down\n', 'other\n', 'MongoDb: down (repeated 2 times)\n',
+                        'other (repeated 1 times)\n']
+
+    repeat_filter.window = 60
+
+    for _ in range(3):
+        logger.warning('last')
+
+    repeat_filter.stop()
+    logger.remove(logger_id)
+
+    assert messages[4:] == ['last\n', 'last (repeated 2 times)\n']
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize(
+    "headers, propagated",
+    [
+        [{}, False],
+        [{'X-Request-ID': 'lb-1234.abc'}, True],
+        [{'X-Request-ID': 'bad id\n'}, False],
+    ]
+)
+def test_request_id(test_app, monkeypatch, headers, propagated):
+    """ Test that a valid request ID is propagated, and that one is created otherwise. """
+
+    seen = {}
+
+    async def mock_exists(_, __):
+        """ Monkeypatch """
+        seen['request_id'] = REQUEST_ID.get()
+        return True
+
+    monkeypatch.setattr(ItemCrud, "exists", mock_exists)
+
+    # ---------------------------------
+
+    response = test_app.head("/v1/items/dbb86c27-2eed-410d-881e-ad47487dd228",
+                             headers=headers | {'X-API-Key': config.service_api_key})
+    request_id = response.headers['X-Request-ID']
+
+    assert response.status_code == 200
+    assert request_id == seen['request_id']
+    assert (request_id == headers.get('X-Request-ID')) is propagated
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.anyio
+async def test_request_id_command_comment():
+    """ Test that the request ID is the comment of the DB commands. """
+
+    seen = {}
+
+    class MockCollection:
+        """ Monkeypatch """
+
+        async def find_one(self, query: dict, **kwargs) -> dict:
+            """ Monkeypatch """
+            seen.update(kwargs)
+            return query
+
+    token = REQUEST_ID.set('abc')
+
+    try:
+        assert await ItemCrud(MockCollection()).exists(uuid4()) is True
+
+    finally:
+        REQUEST_ID.reset(token)
+
+    assert seen == {'projection': {'_id': 1}, 'session': None, 'comment': 'abc'}
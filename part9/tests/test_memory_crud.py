@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+from types import SimpleNamespace
+
+# Third party modules
+import pytest
+
+# Local program modules
+from ..src.config import gunicorn_hooks
+from ..src.config.setup import config
+from ..src.api.memory_crud import InMemoryItemCrud
+from ..src.schemas import Category, ItemPayload, QueryArguments, UpdateArguments
+
+# This is the same as using the @pytest.mark.anyio on all test functions in the module
+pytestmark = pytest.mark.anyio
+
+
+# ---------------------------------------------------------
+#
+async def test_memory_crud_lifecycle():
+    """ Test create, read, query, update and delete on the in-memory store. """
+
+    crud = InMemoryItemCrud()
+    hammer = await crud.create(ItemPayload(name='Hammer', price=9.99, count=20,
+                                           category=Category.TOOLS))
+    await crud.create(ItemPayload(name='Glue', price=2.5, count=5,
+                                  category=Category.CONSUMABLES))
+
+    assert await crud.read(hammer.id) == hammer
+    assert (await crud.read(hammer.id, {'name'})).model_dump() == {'id': hammer.id,
+                                                                   'name': 'Hammer'}
+    assert await crud.query(QueryArguments(name='hammer'), 10) == [hammer]
+    assert await crud.query(QueryArguments(category=Category.TOOLS, count=5), 10) == []
+    assert len(await crud.read_all(1)) == 1
+    assert len(await crud.read_all(10, after=hammer.id)) == 1
+
+    updated = await crud.update(hammer.id, UpdateArguments(count=0))
+
+    assert updated.count == 0
+    assert (await crud.delete(hammer.id)).deleted_count == 1
+    assert await crud.exists(hammer.id) is False
+    assert await crud.update(hammer.id, UpdateArguments(count=1)) is None
+
+
+# ---------------------------------------------------------
+#
+async def test_memory_crud_indexes():
+    """ Test that the indexes follow updates and deletes, and page in key order. """
+
+    crud = InMemoryItemCrud()
+    response = await crud.create_many(
+        [ItemPayload(name=name, price=price, count=count, category=Category.TOOLS)
+         for name, price, count in (('Hammer', 9.99, 1), ('hammer', 5.0, 2),
+                                    ('Pliers', 9.99, 2), ('Glue', 2.5, 2))])
+    hammer, small_hammer, pliers, glue = response.ids
+
+    async def keys(**arguments) -> list:
+        """ Return the keys of the matching Items. """
+        return [item.id for item in await crud.query(QueryArguments(**arguments), 10)]
+
+    assert await keys(name='HAMMER') == [hammer, small_hammer]
+    assert await keys(price=9.99) == [hammer, pliers]
+    assert await keys(count=2, category=Category.TOOLS) == [small_hammer, pliers, glue]
+    assert [item.id for item in await crud.query(QueryArguments(count=2), 1,
+                                                 after=small_hammer)] == [pliers]
+
+    await crud.update(pliers, UpdateArguments(name='Hammer', count=3))
+    await crud.delete(glue)
+
+    assert await keys(name='hammer') == [hammer, small_hammer, pliers]
+    assert await keys(count=2) == [small_hammer]
+    assert await keys(count=3, price=9.99) == [pliers]
+    assert await keys(category=Category.TOOLS) == [hammer, small_hammer, pliers]
+    assert await keys(name='Glue') == []
+
+
+# ---------------------------------------------------------
+#
+async def test_memory_store_single_worker(monkeypatch):
+    """ Test that gunicorn refuses the in-memory store with more than one worker. """
+
+    monkeypatch.setattr(gunicorn_hooks, 'METRICS_DIR', None)
+    monkeypatch.setattr(config, 'item_repository', 'memory')
+    gunicorn_hooks.on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+
+    with pytest.raises(RuntimeError, match='-w 1'):
+        gunicorn_hooks.on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+
+    monkeypatch.setattr(config, 'item_repository', 'mongo')
+    gunicorn_hooks.on_starting(SimpleNamespace(cfg=SimpleNamespace(workers=4)))
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+from uuid import uuid4
+from datetime import timedelta
+
+# Third party modules
+import pytest
+from pymongo import monitoring
+from prometheus_client import REGISTRY, CollectorRegistry
+
+# Local program modules
+from ..src.cache import ItemCache
+from ..src.config.setup import config
+from ..src.api.item_crud import ItemCrud
+from ..src.pool_monitor import PoolMonitor
+from ..src.metrics import CommandMonitor, StatsPublisher
+
+# This is the same as using the @pytest.mark.anyio on all test functions in the module
+pytestmark = pytest.mark.anyio
+
+# Constants
+AUTH = {'Content-Type': 'application/json',
+        'X-API-Key': f'{config.service_api_key}'}
+ITEM_URL = "/v1/items/dbb86c27-2eed-410d-881e-ad47487dd228"
+""" Existing Item endpoint URL. """
+
+
+# ---------------------------------------------------------
+#
+async def test_request_metrics(test_app, monkeypatch):
+    """ Test that requests are recorded per route template and status code. """
+
+    labels = {'method': 'GET', 'route': '/v1/items/{item_id}', 'status': '404'}
+    before = REGISTRY.get_sample_value('http_request_duration_seconds_count', labels) or 0
+
+    # ---------------------------------
+
+    async def mock_read(_, __, ___):
+        """ Monkeypatch """
+        return None
+
+    monkeypatch.setattr(ItemCrud, "read", mock_read)
+
+    # ---------------------------------
+
+    assert test_app.get(ITEM_URL, headers=AUTH).status_code == 404
+    assert REGISTRY.get_sample_value('http_request_duration_seconds_count',
+                                     labels) == before + 1
+
+    response = test_app.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'route="/v1/items/{item_id}"' in response.text
+    assert 'mongodb_pool_connections{state="open"}' in response.text
+
+
+# ---------------------------------------------------------
+#
+async def test_command_metrics():
+    """ Test that MongoDB command latencies are recorded per command name. """
+
+    labels = {'command': 'find', 'outcome': 'succeeded'}
+    before = REGISTRY.get_sample_value('mongodb_command_duration_seconds_count', labels) or 0
+    event = monitoring.CommandSucceededEvent(
+        duration=timedelta(microseconds=1500), reply={'ok': 1}, command_name='find', request_id=1,
+        connection_id=('localhost', 27017), operation_id=1)
+
+    CommandMonitor().succeeded(event)
+
+    assert REGISTRY.get_sample_value('mongodb_command_duration_seconds_count',
+                                     labels) == before + 1
+
+
+# ---------------------------------------------------------
+#
+async def test_stats_publisher():
+    """ Test that the pool and cache counters are published as their change. """
+
+    registry = CollectorRegistry()
+    pool, cache = PoolMonitor(), ItemCache(max_size=2, ttl=60)
+    publisher = StatsPublisher(pool, cache, registry=registry)
+
+    cache.get(uuid4())
+    publisher.publish()
+    cache.get(uuid4())
+    publisher.publish()
+    publisher.publish()
+
+    assert registry.get_sample_value('item_cache_misses_total') == 2
+    assert registry.get_sample_value('item_cache_size') == 0
+    assert registry.get_sample_value('mongodb_pool_connections', {'state': 'open'}) == 0
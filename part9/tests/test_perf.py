@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# BUILTIN modules
+import os
+import json
+import time
+import statistics
+import tracemalloc
+from pathlib import Path
+
+# Third party modules
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+# Local program modules
+from ..src.main import app
+from ..src.config.setup import config
+from ..src.api.item_crud import ItemCrud
+from ..src.fake_motor import FakeMotorClient
+from ..src.api.dependencies import get_repository_crud
+from ..src.schemas import Category, ItemModel, ItemPayload
+
+# Run the budget tests with the anyio backend, and mark them so they can be
+# deselected with: pytest -m "not perf"
+pytestmark = [pytest.mark.anyio, pytest.mark.perf]
+
+# Constants
+URL = "/v1/items"
+""" Root endpoint URL. """
+AUTH = {'Content-Type': 'application/json',
+        'X-API-Key': f'{config.service_api_key}'}
+BUDGET_VERSION = 2
+""" Supported budget file format version. """
+BUDGET_FILE = Path(__file__).parent / 'perf_budgets.json'
+""" Versioned file with the recorded baseline of each endpoint. """
+BUDGETS = json.loads(BUDGET_FILE.read_text())
+""" Recorded baseline and tolerances. """
+RECORD = os.environ.get('PERF_RECORD') == '1'
+""" Record a new baseline in the budget file instead of checking it. """
+CHECK = RECORD or os.environ.get('PERF_BUDGETS') == '1'
+""" Measure the latency and the peak memory (they depend on the machine load). """
+PAYLOAD = {'name': 'Hammer', 'price': 9.99, 'count': 20, 'category': 'tools'}
+""" Item payload used by the create requests. """
+ATTEMPTS = 3
+""" Number of latency measurements before a budget miss is reported. """
+CALIBRATION_ITEMS = 100
+""" Number of Items that are validated and serialized per calibration run. """
+
+
+# ---------------------------------------------------------
+#
+def _request(client: AsyncClient, endpoint: str, ids: list, index: int):
+    """ Return the request for one call of the endpoint.
+
+    :param client: HTTP client.
+    :param endpoint: Endpoint name from the budget file.
+    :param ids: Preloaded Item ids.
+    :param index: Request number.
+    :return: Response awaitable.
+    """
+    key = ids[index % len(ids)]
+
+    if endpoint == 'create':
+        return client.post(URL, json=PAYLOAD, headers=AUTH)
+
+    if endpoint == 'create_many':
+        return client.post(f'{URL}/bulk', json=[PAYLOAD] * 10, headers=AUTH)
+
+    if endpoint == 'list':
+        return client.get(URL, params={'limit': 20}, headers=AUTH)
+
+    if endpoint == 'export':
+        return client.get(f'{URL}/export', headers=AUTH)
+
+    if endpoint == 'exists':
+        return client.head(f'{URL}/{key}', headers=AUTH)
+
+    if endpoint == 'read':
+        return client.get(f'{URL}/{key}', headers=AUTH)
+
+    if endpoint == 'query':
+        return client.get(f'{URL}/', params={'category': 'tools', 'limit': 20},
+                          headers=AUTH)
+
+    if endpoint == 'update':
+        return client.put(f'{URL}/{key}', params={'count': index}, headers=AUTH)
+
+    return client.delete(f'{URL}/{ids.pop()}', headers=AUTH)
+
+
+# ---------------------------------------------------------
+#
+def _calibration() -> float:
+    """ Return the current machine speed in milliseconds.
+
+    This is the time to validate and serialize a fixed number of Items.
+    The latency baselines are recorded relative to it, so that they
+    don't depend on the speed of the machine.
+    """
+    start = time.perf_counter()
+
+    for _ in range(CALIBRATION_ITEMS):
+        ItemModel(**PAYLOAD).model_dump_json()
+
+    return (time.perf_counter() - start) * 1000
+
+
+# ---------------------------------------------------------
+#
+@pytest.fixture
+async def mongo():
+    """ Function fixture, with a preloaded fake MongoDB client.
+
+    The endpoints use the real ItemCrud, without the Item cache, on the
+    fake client, so every DB round trip is counted.
+    """
+    client = FakeMotorClient()
+    collection = client.api_db.items
+    payload = ItemPayload(name='Pliers', price=4.5, count=10, category=Category.TOOLS)
+    await ItemCrud(collection=collection).create_many([payload] * BUDGETS['preload'])
+    app.dependency_overrides[get_repository_crud] = lambda: ItemCrud(collection=collection)
+
+    yield client
+
+    app.dependency_overrides.pop(get_repository_crud)
+
+
+# ---------------------------------------------------------
+#
+async def _latency(client: AsyncClient, endpoint: str, ids: list) -> float:
+    """ Return the fastest request latency relative to the machine speed.
+
+    A calibration run follows every request, and the fastest run of
+    both is compared. Contention on the machine only adds time, and
+    the fastest runs are the least affected by it.
+
+    :param client: HTTP client.
+    :param endpoint: Endpoint name from the budget file.
+    :param ids: Preloaded Item ids.
+    :return: Fastest latency, as a multiple of the fastest calibration time.
+    """
+    latencies = []
+    calibrations = []
+
+    for index in range(1, BUDGETS['requests'] + 1):
+        request = _request(client, endpoint, ids, index)
+        start = time.perf_counter()
+        response = await request
+        latencies.append((time.perf_counter() - start) * 1000)
+        calibrations.append(_calibration())
+        assert response.is_success
+
+    return min(latencies) / min(calibrations)
+
+
+# ---------------------------------------------------------
+#
+def _record(endpoint: str, measured: dict):
+    """ Record the measured baseline of an endpoint in the budget file.
+
+    :param endpoint: Endpoint name.
+    :param measured: Measured baseline.
+    """
+    budgets = json.loads(BUDGET_FILE.read_text())
+    budgets['endpoints'][endpoint] = measured
+    BUDGET_FILE.write_text(json.dumps(budgets, indent=2) + '\n')
+
+
+# ---------------------------------------------------------
+#
+def test_budget_file():
+    """ Test that the budget file has the supported format. """
+
+    assert BUDGETS['version'] == BUDGET_VERSION
+    assert ATTEMPTS * BUDGETS['requests'] + 2 <= BUDGETS['preload']
+
+
+# ---------------------------------------------------------
+#
+@pytest.mark.parametrize("endpoint", sorted(BUDGETS['endpoints']))
+async def test_endpoint_budget(mongo, endpoint):
+    """ Test that an endpoint stays within its recorded per-request baseline.
+
+    The DB round trips of a request must match the baseline exactly.
+
+    The latency and the peak memory depend on the machine load, so they
+    are only checked with PERF_BUDGETS=1. The fastest latency of a number
+    of requests is compared, after a warm-up request, relative to the
+    machine speed calibration. A budget miss is measured again, and the
+    best of ATTEMPTS measurements is used (the baseline is recorded as
+    their median). The peak memory is measured for a separate request,
+    since tracemalloc slows down the code. They may exceed the baseline
+    by the tolerances.
+
+    A new baseline is recorded with: PERF_RECORD=1 pytest -m perf
+    """
+    baseline = BUDGETS['endpoints'][endpoint]
+    tolerance = BUDGETS['tolerance']
+    ids = [str(key) for key in mongo.api_db.items.documents]
+    limit = baseline.get('latency', 0) * (1 + tolerance['latency'])
+    latencies = []
+
+    async with AsyncClient(transport=ASGITransport(app=app),
+                           base_url='http://perf') as client:
+        assert (await _request(client, endpoint, ids, 0)).is_success
+
+        for _ in range(ATTEMPTS if CHECK else 0):
+            latencies.append(await _latency(client, endpoint, ids))
+
+            if min(latencies) <= limit and not RECORD:
+                break
+
+        mongo.operations.clear()
+        request = _request(client, endpoint, ids, 0)
+        tracemalloc.start()
+        response = await request
+        peak = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+        assert response.is_success
+
+    if RECORD:
+        _record(endpoint, {'latency': round(statistics.median(latencies), 2),
+                           'peak_kib': round(peak, 1),
+                           'db_operations': dict(mongo.operations)})
+        return
+
+    assert dict(mongo.operations) == baseline['db_operations'], endpoint
+
+    if CHECK:
+        assert min(latencies) <= limit, (
+            f"{endpoint}: {min(latencies):.2f} x calibration, baseline {baseline['latency']}")
+        assert peak <= baseline['peak_kib'] * (1 + tolerance['peak']), (
+            f"{endpoint}: {peak:.1f} KiB, baseline {baseline['peak_kib']} KiB")
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright: Wilde Consulting
+  License: Apache 2.0
+
+VERSION INFO::
+    $Repo: fastapi_mongo
+  $Author: Anders Wiklund
+    $Date: 2024-04-26 17:38:52
+     $Rev: 9
+"""
+
+# Third party modules
+from pymongo import monitoring
+
+# Local program modules
+from ..src.pool_monitor import PoolMonitor
+
+# Constants
+ADDRESS = ('localhost', 27017)
+""" Test server address. """
+
+
+# ---------------------------------------------------------
+#
+def test_pool_monitor_checkouts():
+    """ Test that checkouts, check-ins and connections are counted. """
+
+    monitor = PoolMonitor()
+    monitor.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, 1))
+    monitor.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+
+    assert monitor.stats().waiting == 1
+
+    monitor.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1))
+    stats = monitor.stats()
+
+    assert (stats.size, stats.checked_out, stats.waiting, stats.checkouts) == (1, 1, 0, 1)
+    assert stats.wait_time_total == stats.wait_time_max >= 0
+
+    monitor.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+    monitor.connection_closed(monitoring.ConnectionClosedEvent(ADDRESS, 1, 'idle'))
+    stats = monitor.stats()
+
+    assert (stats.size, stats.checked_out, stats.checkouts) == (0, 0, 1)
+
+
+# ---------------------------------------------------------
+#
+def test_pool_monitor_checkout_failures():
+    """ Test that failed checkouts and wait queue timeouts are counted. """
+
+    monitor = PoolMonitor()
+
+    for reason in (monitoring.ConnectionCheckOutFailedReason.TIMEOUT,
+                   monitoring.ConnectionCheckOutFailedReason.CONN_ERROR):
+        monitor.connection_check_out_started(
+            monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+        monitor.connection_check_out_failed(
+            monitoring.ConnectionCheckOutFailedEvent(ADDRESS, reason))
+
+    stats = monitor.stats()
+
+    assert (stats.waiting, stats.checkouts) == (0, 0)
+    assert (stats.checkout_failures, stats.checkout_timeouts) == (2, 1)
@@ -11,55 +11,320 @@ VERSION INFO::
 """
 
 # BUILTIN modules
+import json
+import time
+import random
 import asyncio
-from pprint import pprint
+import argparse
+from typing import Dict, List, Optional
 
 # Third party modules
-from httpx import ConnectError, ReadTimeout, AsyncClient
+from httpx import ConnectError, ReadTimeout, AsyncClient, ASGITransport
 
 # Local program modules
 from src.config.setup import config
 
 # Constants
+URL = '/v1/items'
+""" Item endpoint URL. """
 AUTH = {'Content-Type': 'application/json',
         'X-API-Key': f'{config.service_api_key}'}
+ENDPOINTS = ('create', 'read', 'query', 'list', 'update', 'delete')
+""" Endpoint names used in the mix. """
+DEFAULT_MIX = 'create=1,read=5,query=2,list=1,update=1,delete=1'
+""" Default endpoint mix, as relative weights. """
+NAMES = ('Hammer', 'Pliers', 'Wrench', 'Nails', 'Screws', 'Glue')
+""" Item names used in the generated requests. """
+
+
+# -----------------------------------------------------------------------------
+#
+class LoadTest:
+    """ Drive a weighted mix of the Item endpoints and record the latencies.
+
+    A fixed number of workers send requests back to back. When a target
+    rate is given, the request start times are spread evenly over time
+    instead, and the workers only limit the concurrency. The latency is
+    then measured from the scheduled start time, so the time a request
+    waits for a free worker is included (no coordinated omission).
+
+    Requests that need an Item are sent as create requests when there
+    are no Items left, so every endpoint can be reported.
+
+    :ivar client: HTTP client.
+    :ivar mix: Endpoint weights.
+    :ivar rps: Possible target number of requests per second.
+    :ivar latencies: Request latencies in seconds, per endpoint.
+    :ivar errors: Number of failed requests, per endpoint.
+    """
+
+    def __init__(self, client: AsyncClient, mix: Dict[str, int],
+                 rps: Optional[float], seed: int):
+        """ Implicit constructor.
+
+        :param client: HTTP client.
+        :param mix: Endpoint weights.
+        :param rps: Possible target number of requests per second.
+        :param seed: Random seed, for a reproducible request sequence.
+        """
+        self.rps = rps
+        self.mix = mix
+        self.client = client
+        self.ids: List[str] = []
+        self.random = random.Random(seed)
+        self.errors = {name: 0 for name in ENDPOINTS}
+        self.latencies = {name: [] for name in ENDPOINTS}
+        self._sent = 0
+        self._started = 0.0
+
+    # ---------------------------------------------------------
+    #
+    def _payload(self) -> dict:
+        """ Return a new Item payload. """
+        return {'name': self.random.choice(NAMES),
+                'price': round(self.random.uniform(1, 100), 2),
+                'count': self.random.randint(0, 500),
+                'category': self.random.choice(('tools', 'consumables'))}
+
+    # ---------------------------------------------------------
+    #
+    async def _send(self, endpoint: str, scheduled: Optional[float] = None):
+        """ Send one request to the endpoint and record the outcome.
+
+        :param endpoint: Endpoint name from the mix.
+        :param scheduled: Possible scheduled start time, for the target rate.
+        """
+        if endpoint in ('read', 'update', 'delete') and not self.ids:
+            endpoint = 'create'
+
+        if endpoint == 'create':
+            request = self.client.post(URL, json=self._payload(), headers=AUTH)
+
+        elif endpoint == 'read':
+            request = self.client.get(f'{URL}/{self.random.choice(self.ids)}', headers=AUTH)
+
+        elif endpoint == 'query':
+            params = {'category': self.random.choice(('tools', 'consumables')), 'limit': 20}
+            request = self.client.get(f'{URL}/', params=params, headers=AUTH)
+
+        elif endpoint == 'list':
+            request = self.client.get(URL, params={'limit': 20}, headers=AUTH)
+
+        elif endpoint == 'update':
+            params = {'count': self.random.randint(0, 500)}
+            request = self.client.put(f'{URL}/{self.random.choice(self.ids)}',
+                                      params=params, headers=AUTH)
+
+        else:
+            key = self.ids.pop(self.random.randrange(len(self.ids)))
+            request = self.client.delete(f'{URL}/{key}', headers=AUTH)
+
+        start = time.perf_counter() if scheduled is None else scheduled
+
+        try:
+            response = await request
+
+        except (ConnectError, ReadTimeout):
+            self.errors[endpoint] += 1
+            return
+
+        finally:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+
+        # A concurrent delete can remove an Item that another worker reads.
+        if response.status_code >= 400 and response.status_code != 404:
+            self.errors[endpoint] += 1
+
+        elif endpoint == 'create':
+            self.ids.append(response.json()['id'])
+
+    # ---------------------------------------------------------
+    #
+    async def _worker(self, requests: int):
+        """ Send requests until the total number of requests is reached.
+
+        :param requests: Total number of requests.
+        """
+        endpoints, weights = list(self.mix), list(self.mix.values())
+
+        while self._sent < requests:
+            slot = self._sent
+            self._sent += 1
+
+            scheduled = None
+
+            if self.rps:
+                scheduled = self._started + slot / self.rps
+                delay = scheduled - time.perf_counter()
+
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            await self._send(self.random.choices(endpoints, weights)[0], scheduled)
+
+    # ---------------------------------------------------------
+    #
+    async def run(self, requests: int, concurrency: int, preload: int) -> float:
+        """ Run the load test.
+
+        :param requests: Total number of requests.
+        :param concurrency: Number of concurrent requests.
+        :param preload: Number of Items created before the test starts.
+        :return: Elapsed time in seconds.
+        :except RuntimeError: An Item could not be preloaded.
+        """
+        for _ in range(preload):
+            response = await self.client.post(URL, json=self._payload(), headers=AUTH)
+
+            if response.status_code != 201:
+                raise RuntimeError(f'Preload failed with status '
+                                   f'{response.status_code}: {response.text}')
+
+            self.ids.append(response.json()['id'])
+
+        self._started = time.perf_counter()
+        await asyncio.gather(*(self._worker(requests) for _ in range(concurrency)))
+        return time.perf_counter() - self._started
+
+    # ---------------------------------------------------------
+    #
+    def report(self, elapsed: float) -> dict:
+        """ Return throughput, latency percentiles and errors per endpoint.
+
+        :param elapsed: Elapsed time in seconds.
+        :return: Load test report, with latencies in milliseconds.
+        """
+        def percentile(values: List[float], part: float) -> float:
+            """ Return the nearest-rank percentile in milliseconds. """
+            return round(values[max(0, round(part * len(values)) - 1)] * 1000, 3)
+
+        result = {'elapsed': round(elapsed, 3),
+                  'throughput': round(sum(map(len, self.latencies.values())) / elapsed, 1),
+                  'endpoints': {}}
+
+        for name, values in self.latencies.items():
+            if not values:
+                continue
+
+            values.sort()
+            result['endpoints'][name] = {
+                'requests': len(values), 'errors': self.errors[name],
+                'throughput': round(len(values) / elapsed, 1),
+                'p50': percentile(values, 0.50), 'p95': percentile(values, 0.95),
+                'p99': percentile(values, 0.99), 'max': percentile(values, 1.0)}
+
+        return result
+
+
+# ---------------------------------------------------------
+#
+def parse_mix(mix: str) -> Dict[str, int]:
+    """ Return the endpoint weights from a mix like 'read=5,create=1'.
+
+    :param mix: Endpoint mix.
+    :return: Endpoint weights.
+    """
+    weights = {name: int(weight) for name, weight in
+               (item.split('=') for item in mix.split(','))}
+    unknown = set(weights) - set(ENDPOINTS)
+
+    if unknown:
+        raise ValueError(f'Unknown endpoints in mix: {sorted(unknown)}')
+
+    return weights
 
 
 # ---------------------------------------------------------
 #
-async def process(use_auth: bool = False):
-    """ Process requests. """
+def create_client(url: str, in_process: bool,
+                  fake_latency: Optional[float]) -> AsyncClient:
+    """ Return an HTTP client for a running server, or for the app in-process.
+
+    In-process the app runs on an in-memory Item store, so neither a server
+    nor MongoDB is needed. This measures the service code alone. With a
+    fake latency, the MongoDB Item operations run on a fake MongoDB client
+    instead, with that latency per DB round trip.
+
+    :param url: Server base URL.
+    :param in_process: Call the app in-process.
+    :param fake_latency: Possible fake MongoDB latency, in seconds.
+    :return: HTTP client.
+    """
+    if not in_process:
+        return AsyncClient(base_url=url, timeout=(9.05, 60))
 
-    async with AsyncClient() as client:
-        response = await client.get(url='http://localhost:8000/v1/items',
-                                    headers=(AUTH if use_auth else None),
-                                    timeout=(9.05, 60))
+    from src.main import app
+    from src.api.item_crud import ItemCrud
+    from src.fake_motor import FakeMotorClient
+    from src.api.memory_crud import InMemoryItemCrud
+    from src.api.dependencies import get_repository_crud
 
-    if response.status_code == 200:
-        print(f'\nTRUE =>')
-        pprint(response.json())
+    if fake_latency is None:
+        crud = InMemoryItemCrud()
 
     else:
-        print(f'\nFALSE => \nstatus: {response.status_code}, error: {response.text}')
+        crud = ItemCrud(collection=FakeMotorClient(fake_latency).api_db.items)
+
+    app.dependency_overrides[get_repository_crud] = lambda: crud
+    return AsyncClient(transport=ASGITransport(app=app), base_url='http://loadtest')
 
 
 # ---------------------------------------------------------
 #
-async def test():
+async def main(args: argparse.Namespace):
+    """ Run the load test and print the report. """
+
     try:
-        await process()
-        await process(use_auth=True)
+        async with create_client(args.url, args.in_process, args.fake_latency) as client:
+            test = LoadTest(client, parse_mix(args.mix), args.rps, args.seed)
+            elapsed = await test.run(args.requests, args.concurrency, args.preload)
 
-    # You will end up here if you have not started the API server program (run.py).
-    except ConnectError as why:
-        print(f'ERROR => {why}')
+        report = test.report(elapsed)
+
+        if args.json:
+            print(json.dumps(report, indent=2))
+            return
 
-    # You can test this by changing the read timeout value from 60 seconds to 0.01.
-    except ReadTimeout as why:
-        print(f'TIMEOUT => {why}')
+        print(f"\n{report['throughput']} requests/s in {report['elapsed']} s\n")
+        print(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>10}"
+              f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+
+        for name, item in report['endpoints'].items():
+            print(f"{name:<10}{item['requests']:>10}{item['errors']:>8}{item['throughput']:>10}"
+                  f"{item['p50']:>10}{item['p95']:>10}{item['p99']:>10}{item['max']:>10}")
+
+    # You will end up here if you have not started the API server program (run.py),
+    # or when the service rejects the preload requests (like a wrong API key).
+    except (ConnectError, RuntimeError) as why:
+        print(f'ERROR => {why}')
 
 
 # ---------------------------------------------------------
 
 if __name__ == "__main__":
-    asyncio.run(test())
+    Form = argparse.ArgumentDefaultsHelpFormatter
+    description = 'A load test utility that drives a mix of the Item endpoints.'
+    parser = argparse.ArgumentParser(description=description, formatter_class=Form)
+    parser.add_argument("--url", default='http://localhost:8000',
+                        help="Server base URL")
+    parser.add_argument("--in-process", action="store_true", dest="in_process",
+                        help="Call the app in-process, with an in-memory Item store")
+    parser.add_argument("--fake-mongo", type=float, dest="fake_latency", default=None,
+                        metavar="LATENCY",
+                        help="In-process, use a fake MongoDB client with this "
+                             "latency per round trip in seconds")
+    parser.add_argument("-n", type=int, dest="requests", default=1000,
+                        help="Total number of requests")
+    parser.add_argument("-c", type=int, dest="concurrency", default=10,
+                        help="Number of concurrent requests")
+    parser.add_argument("--rps", type=float, default=None,
+                        help="Target number of requests per second (default is no limit)")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="Endpoint mix, as relative weights")
+    parser.add_argument("--preload", type=int, default=100,
+                        help="Number of Items created before the test starts")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="Random seed, for a reproducible request sequence")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the report as JSON")
+    asyncio.run(main(parser.parse_args()))